@@ -0,0 +1,107 @@
+#Script to convert many chronostratigraphic chart TTL files (e.g. an archive of
+#chart releases) in parallel, each one into its own output directory
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from converter import COLLECTIONS, PARSERS, convert
+from json_writer import add_arguments, format_from_args
+
+def find_ttl_files(inputs):
+    # Expand directories and glob patterns into a sorted list of TTL files
+    ttl_files = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            ttl_files.update(glob.glob(os.path.join(pattern, '*.ttl')))
+        else:
+            ttl_files.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(ttl_files)
+
+def chart_output_dirs(output_root, ttl_files):
+    # TTL file -> its output directory: <output_root>/<path of the file relative to the
+    # common directory of all the files, without extension>, so that charts with the
+    # same name in different directories (arch/2023/chart.ttl, arch/2024/chart.ttl)
+    # don't overwrite each other
+    paths = [os.path.abspath(ttl_file) for ttl_file in ttl_files]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths]) if paths else ''
+    output_dirs = {ttl_file: os.path.join(output_root, os.path.splitext(os.path.relpath(path, root))[0])
+                   for ttl_file, path in zip(ttl_files, paths)}
+
+    files_by_dir = {}
+    for ttl_file, output_dir in output_dirs.items():
+        files_by_dir.setdefault(os.path.normcase(output_dir), []).append(ttl_file)
+    duplicates = [files for files in files_by_dir.values() if len(files) > 1]
+    if duplicates:
+        raise ValueError("These files would be written to the same output directory: "
+                         + '; '.join(', '.join(files) for files in duplicates))
+    return output_dirs
+
+def convert_one(ttl_file, output_dir, options):
+    # Runs in a worker process. The converter messages are captured so that the
+    # output of parallel conversions isn't interleaved
+    log = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            collections = convert(ttl_file, output_dir=output_dir, **options)
+        counts = {key: len(collections[key]) for _, key, _ in COLLECTIONS}
+        error = None
+    except Exception as e:
+        counts = {}
+        error = f"{type(e).__name__}: {e}"
+    return ttl_file, output_dir, time.perf_counter() - start, counts, error, log.getvalue()
+
+def batch_convert(ttl_files, output_root='outputs', jobs=None, verbose=False, **options):
+    # Convert the files on a process pool and report progress as they finish.
+    # Returns the list of files that failed
+    # Raises ValueError before any work is submitted when two files share a directory
+    output_dirs = chart_output_dirs(output_root, ttl_files)
+    failed = []
+    total_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(convert_one, ttl_file, output_dirs[ttl_file], options)
+                   for ttl_file in ttl_files]
+        for done, future in enumerate(as_completed(futures), start=1):
+            ttl_file, output_dir, seconds, counts, error, log = future.result()
+            if error:
+                failed.append(ttl_file)
+                print(f"[{done}/{len(ttl_files)}] FAILED {ttl_file} after {seconds:.2f} s: {error}")
+            else:
+                print(f"[{done}/{len(ttl_files)}] {ttl_file} -> {output_dir} in {seconds:.2f} s "
+                      f"({sum(counts.values())} records)")
+            if verbose:
+                print(log)
+
+    print(f"\nConverted {len(ttl_files) - len(failed)} of {len(ttl_files)} charts in {time.perf_counter() - total_start:.2f} s")
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert many chronostratigraphic chart TTL files in parallel")
+    parser.add_argument('inputs', nargs='+', help="TTL files, directories containing TTL files, or glob patterns")
+    parser.add_argument('--output-dir', default='outputs', help="root directory, each chart is written to a subdirectory named after its path below the common directory of the inputs")
+    parser.add_argument('--jobs', '-j', type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--verbose', '-v', action='store_true', help="print the converter messages of each chart")
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL files, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto')
+    parser.add_argument('--normalized', action='store_true', help="write chart_normalized.json instead of the nested files")
+    parser.add_argument('--incremental', action='store_true', help="only rewrite the files whose concepts changed")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    ttl_files = find_ttl_files(args.inputs)
+    if not ttl_files:
+        parser.error("no TTL files found")
+    json_format = format_from_args(parser, args)
+    try:
+        chart_output_dirs(args.output_dir, ttl_files)
+    except ValueError as e:
+        parser.error(str(e))
+    failed = batch_convert(ttl_files, args.output_dir, args.jobs, args.verbose, use_cache=not args.no_cache,
+                           parser=args.parser, normalized=args.normalized, incremental=args.incremental,
+                           json_format=json_format)
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,134 @@
+#Benchmark of the query strategies used to read the chart with rdflib:
+#SPARQL query strings (parsed and algebrized on every call), prepared queries
+#(rdflib.plugins.sparql.prepareQuery with bound variables) and direct triple
+#pattern access (g.triples / g.objects / the grouped table of converter.py)
+#
+#Usage: python benchmarks/bench_queries.py [TTL file] [--repeat N]
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rdflib
+from rdflib.namespace import RDF
+from rdflib.plugins.sparql import prepareQuery
+
+import converter
+
+SKOS = rdflib.Namespace("http://www.w3.org/2004/02/skos/core#")
+ISCHART = rdflib.Namespace("http://resource.geosciml.org/classifier/ics/ischart/")
+
+COLLECTION_NAMES = [collection for collection, _, _ in converter.COLLECTIONS]
+
+MEMBER_QUERY = """
+    PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+    PREFIX ischart: <http://resource.geosciml.org/classifier/ics/ischart/>
+
+    SELECT ?member
+    WHERE {
+        ischart:%s skos:member ?member .
+    }
+"""
+
+# One prepared statement for every collection, bound with initBindings
+PREPARED_MEMBER_QUERY = prepareQuery("""
+    SELECT ?member
+    WHERE {
+        ?collection skos:member ?member .
+    }
+""", initNs={'skos': SKOS})
+
+CONCEPT_QUERY = """
+    PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+
+    SELECT DISTINCT ?subject
+    WHERE {
+        ?subject a skos:Concept .
+        {?subject skos:prefLabel ?label} UNION {?subject skos:altLabel ?label}
+    }
+"""
+
+PREPARED_CONCEPT_QUERY = prepareQuery(CONCEPT_QUERY)
+
+def members_sparql(g):
+    return [[row.member for row in g.query(MEMBER_QUERY % name)] for name in COLLECTION_NAMES]
+
+def members_prepared(g):
+    return [[row.member for row in g.query(PREPARED_MEMBER_QUERY, initBindings={'collection': ISCHART[name]})]
+            for name in COLLECTION_NAMES]
+
+def members_triples(g):
+    return [list(g.objects(ISCHART[name], SKOS.member)) for name in COLLECTION_NAMES]
+
+def concepts_sparql(g):
+    return [row[0] for row in g.query(CONCEPT_QUERY)]
+
+def concepts_prepared(g):
+    return [row[0] for row in g.query(PREPARED_CONCEPT_QUERY)]
+
+def concepts_triples(g):
+    return [subject for subject in g.subjects(RDF.type, SKOS.Concept, unique=True)
+            if (subject, SKOS.prefLabel, None) in g or (subject, SKOS.altLabel, None) in g]
+
+class GraphLookups:
+    # Stand-in for the grouped table of converter.py that answers every lookup
+    # with a g.objects() call, as the per-field code of the original converter did
+    def __init__(self, g, subject=None):
+        self.g = g
+        self.subject = subject
+
+    def get(self, key, default=None):
+        if self.subject is None:
+            # Subject lookup: blank node identifiers have no ':'
+            return GraphLookups(self.g, rdflib.URIRef(key) if ':' in key else rdflib.BNode(key))
+        return list(self.g.objects(self.subject, rdflib.URIRef(key)))
+
+def extract_with_graph_lookups(ttl_file):
+    g = rdflib.Graph()
+    g.parse(ttl_file, format='ttl')
+    return converter.extract_collections(GraphLookups(g))
+
+def extract_with_grouped_table(ttl_file):
+    # load_graph() groups the triples while parsing, so the parse is timed too
+    return converter.extract_collections(converter.group_triples(converter.load_graph(ttl_file)))
+
+# (title, strategies, whether all the strategies must return the same result, whether
+# the strategies take the TTL file instead of the loaded graph)
+BENCHMARKS = [
+    ('collection members', [('SPARQL strings', members_sparql), ('prepared query', members_prepared),
+                            ('triple patterns', members_triples)], True, False),
+    ('labelled concepts', [('SPARQL strings', concepts_sparql), ('prepared query', concepts_prepared),
+                           ('triple patterns', concepts_triples)], True, False),
+    ('concept records, parse included', [('g.objects per field', extract_with_graph_lookups),
+                                         ('grouped table (converter)', extract_with_grouped_table)], True, True),
+]
+
+def run(ttl_file, repeat):
+    g = converter.load_graph(ttl_file)
+    print(f"Loaded {len(g)} triples from {ttl_file}\n")
+
+    for title, strategies, same_result, from_file in BENCHMARKS:
+        source = ttl_file if from_file else g
+        if same_result:
+            # Same items in the same order, so that the strategies are interchangeable
+            results = [function(source) for _, function in strategies]
+            if any(result != results[0] for result in results):
+                raise AssertionError(f"Strategies of '{title}' return different results")
+
+        print(title)
+        baseline = None
+        for label, function in strategies:
+            number = 5
+            seconds = min(timeit.repeat(lambda: function(source), number=number, repeat=repeat)) / number
+            baseline = baseline or seconds
+            print(f"  {label:<28} {seconds * 1000:9.3f} ms  ({baseline / seconds:5.1f}x)")
+        print()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare SPARQL, prepared queries and triple patterns on a chart file")
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.ttl_file, args.repeat)
@@ -0,0 +1,174 @@
+#Scaling benchmark of converter.py, extract_translations.py and build_chart.py on synthetic charts
+#
+#Synthetic charts are generated (see synthetic_chart.py) with 1x, 10x, 100x and 1000x
+#the concepts of the real chart, and with 1x ... 1000x its altLabel languages. Every
+#script is then run on every chart in a fresh process, which records the wall time
+#of the parse, extract and write phases and the peak memory (max RSS). The write phase
+#streams the documents through json_writer.write_json, as the scripts do, with the
+#--minify/--compress options given to the benchmark.
+#
+#Results are written as JSON so that runs can be compared for regressions:
+#    python benchmarks/bench_scaling.py --scales 1 10 --output new.json --compare old.json
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from json_writer import add_arguments, format_from_args
+from synthetic_chart import generate_chart
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+DEFAULT_OUTPUT = os.path.join(BENCHMARKS_DIR, 'results', 'scaling.json')
+
+# Benchmarked runs: (name, script, parser)
+RUNS = [
+    ('converter (stream)', 'converter', 'stream'),
+    ('converter (rdflib)', 'converter', 'rdflib'),
+    ('translations (stream)', 'translations', 'stream'),
+    ('translations (rdflib)', 'translations', 'rdflib'),
+    ('build_chart (stream)', 'pipeline', 'stream'),
+]
+
+PHASES = ['parse', 'extract', 'write']
+
+def run_phases(script, parser, ttl_file, output_dir, minify='0', compress=''):
+    # Runs in the worker process: time every phase of one script on one chart
+    import build_chart
+    import converter
+    import extract_translations
+    from json_writer import json_format, write_json
+    from profiling import max_rss_mb
+
+    output_format = json_format(minify == '1', compress.split(',') if compress else ())
+    timings = {}
+    def phase(name, function):
+        start = time.perf_counter()
+        # The scripts report their progress on stdout, which isn't wanted here
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = function()
+        timings[name] = time.perf_counter() - start
+        return result
+
+    # (file name, data, ensure_ascii) of the documents written by the script
+    if script == 'converter':
+        table = phase('parse', lambda: converter.read_triples(ttl_file, parser))
+        collections = phase('extract', lambda: converter.extract_collections(table))
+        documents = [(name, data, True) for name, data in converter.output_documents(collections)]
+    elif script == 'pipeline':
+        # Both outputs from one parse and one walk over the concepts
+        table = phase('parse', lambda: converter.read_triples(ttl_file, parser))
+        def extract():
+            records_by_uri, translations = build_chart.walk_concepts(table)
+            return converter.extract_collections(table, records_by_uri), translations
+        collections, translations = phase('extract', extract)
+        documents = ([(name, data, True) for name, data in converter.output_documents(collections)]
+                     + [(f"{lang}.json", data, False) for lang, data in translations.items()])
+    else:
+        table = phase('parse', lambda: converter.read_triples(ttl_file, parser))
+        translations = phase('extract', lambda: extract_translations.translations_from_table(table))
+        documents = [(f"{lang}.json", data, False) for lang, data in translations.items()]
+
+    def write():
+        for name, data, ensure_ascii in documents:
+            write_json(data, os.path.join(output_dir, name), output_format, ensure_ascii=ensure_ascii)
+    phase('write', write)
+
+    return {'timings': timings, 'peak_memory_mb': max_rss_mb()}
+
+def measure(script, parser, ttl_file, output_format):
+    # Run one measurement in a fresh Python process, so that peak memory and
+    # import/caching effects don't leak from one run to the next
+    with tempfile.TemporaryDirectory() as output_dir:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', script, parser, ttl_file, output_dir,
+                   '1' if output_format.minify else '0', ','.join(output_format.compress)]
+        completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def chart_file(work_dir, concept_scale, language_scale):
+    # Synthetic charts are generated once and kept in the work directory
+    path = os.path.join(work_dir, f"chart-c{concept_scale}-l{language_scale}.ttl")
+    if not os.path.exists(path):
+        print(f"Generating {path}")
+        generate_chart(path, concept_scale, language_scale)
+    return path
+
+def run(scales, language_scales, work_dir, output_format):
+    cases = [(scale, 1) for scale in scales] + [(1, scale) for scale in language_scales if scale != 1 or 1 not in scales]
+    results = []
+    for concept_scale, language_scale in cases:
+        ttl_file = chart_file(work_dir, concept_scale, language_scale)
+        for name, script, parser in RUNS:
+            measurement = measure(script, parser, ttl_file, output_format)
+            timings = measurement['timings']
+            results.append({
+                'run': name,
+                'concept_scale': concept_scale,
+                'language_scale': language_scale,
+                'file_size_mb': os.path.getsize(ttl_file) / (1024 * 1024),
+                'timings': timings,
+                'total': sum(timings.values()),
+                'peak_memory_mb': measurement['peak_memory_mb'],
+            })
+            print_result(results[-1])
+    return results
+
+def print_result(result):
+    phases = "  ".join(f"{phase} {result['timings'][phase]:8.3f}s" for phase in PHASES)
+    print(f"{result['run']:<22} concepts x{result['concept_scale']:<5} languages x{result['language_scale']:<5} "
+          f"{phases}  total {result['total']:8.3f}s  peak {result['peak_memory_mb']:8.1f} MB")
+
+def compare(results, baseline_file, threshold):
+    # Print the ratio of the total time and peak memory to a previous run, and
+    # return the runs that got slower than the threshold
+    with open(baseline_file) as f:
+        baseline = {(r['run'], r['concept_scale'], r['language_scale']): r for r in json.load(f)['results']}
+    regressions = []
+    print(f"\nCompared to {baseline_file}:")
+    for result in results:
+        previous = baseline.get((result['run'], result['concept_scale'], result['language_scale']))
+        if previous is None:
+            continue
+        time_ratio = result['total'] / previous['total']
+        memory_ratio = result['peak_memory_mb'] / previous['peak_memory_mb']
+        flag = "  REGRESSION" if time_ratio > threshold else ""
+        print(f"{result['run']:<22} concepts x{result['concept_scale']:<5} languages x{result['language_scale']:<5} "
+              f"time {time_ratio:5.2f}x  memory {memory_ratio:5.2f}x{flag}")
+        if flag:
+            regressions.append(result)
+    return regressions
+
+if __name__ == "__main__":
+    if len(sys.argv) == 8 and sys.argv[1] == '--worker':
+        print(json.dumps(run_phases(*sys.argv[2:])))
+        raise SystemExit(0)
+
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the converter and the translation extraction")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help="multipliers of the number of concepts")
+    parser.add_argument('--language-scales', type=int, nargs='+', default=DEFAULT_SCALES, help="multipliers of the number of languages")
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), 'icc_bench'), help="directory for the synthetic charts")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="JSON file for the results")
+    parser.add_argument('--compare', help="previous results file to compare with")
+    parser.add_argument('--threshold', type=float, default=1.2, help="time ratio reported as a regression")
+    add_arguments(parser)
+    args = parser.parse_args()
+    output_format = format_from_args(parser, args)
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    results = run(args.scales, args.language_scales, args.work_dir, output_format)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'python': sys.version.split()[0], 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   'format': output_format._asdict(), 'results': results}, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        raise SystemExit(1)
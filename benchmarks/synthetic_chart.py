@@ -0,0 +1,143 @@
+#Generator of synthetic ICS-shaped TTL files, for benchmarks at larger scales than
+#the real chart
+#
+#The real chart is read with the streaming reader and written out again with:
+#- `concept_scale` copies of every concept (ischart:Maastrichtian, ischart:MaastrichtianCopy1, ...),
+#  each copy with its own broader/narrower links, collection membership, sh:order
+#  and labels, and the same predicates and time:hasBeginning/time:hasEnd blank nodes
+#- `language_scale` times the altLabel languages: every altLabel is repeated with
+#  private-use dialect tags (de, de-x-s1, de-x-s2, ...)
+#
+#Usage: python benchmarks/synthetic_chart.py OUTPUT.ttl [--concept-scale N] [--language-scale N]
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ttl_reader import RDF_TYPE, XSD, Literal, read_ttl
+
+SOURCE_TTL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ChronostratChart2024-12.ttl')
+
+PREFIXES = [
+    ('dcterms', "http://purl.org/dc/terms/"),
+    ('gts', "http://resource.geosciml.org/ontology/timescale/gts#"),
+    ('ischart', "http://resource.geosciml.org/classifier/ics/ischart/"),
+    ('owl', "http://www.w3.org/2002/07/owl#"),
+    ('prov', "http://www.w3.org/ns/prov#"),
+    ('rank', "http://resource.geosciml.org/ontology/timescale/rank/"),
+    ('rdfs', "http://www.w3.org/2000/01/rdf-schema#"),
+    ('sdo', "https://schema.org/"),
+    ('sh', "http://www.w3.org/ns/shacl#"),
+    ('skos', "http://www.w3.org/2004/02/skos/core#"),
+    ('time', "http://www.w3.org/2006/time#"),
+    ('ts', "http://resource.geosciml.org/vocabulary/timescale/"),
+    ('xsd', XSD),
+]
+
+SKOS_CONCEPT = "http://www.w3.org/2004/02/skos/core#Concept"
+SKOS_MEMBER = "http://www.w3.org/2004/02/skos/core#member"
+SKOS_PREF_LABEL = "http://www.w3.org/2004/02/skos/core#prefLabel"
+SKOS_ALT_LABEL = "http://www.w3.org/2004/02/skos/core#altLabel"
+SH_ORDER = "http://www.w3.org/ns/shacl#order"
+
+_LOCAL_NAME_RE = re.compile(r'[A-Za-z0-9_-]*')
+_NUMERIC_TYPES = (XSD + 'integer', XSD + 'decimal', XSD + 'double')
+
+def format_iri(iri):
+    for prefix, namespace in PREFIXES:
+        if iri.startswith(namespace) and _LOCAL_NAME_RE.fullmatch(iri[len(namespace):]):
+            return f"{prefix}:{iri[len(namespace):]}"
+    return f"<{iri}>"
+
+def format_literal(literal):
+    if literal.datatype in _NUMERIC_TYPES or literal.datatype == XSD + 'boolean':
+        return str(literal)
+    escaped = (str(literal).replace('\\', '\\\\').replace('"', '\\"')
+               .replace('\n', '\\n').replace('\r', '\\r'))
+    if literal.language:
+        return f'"{escaped}"@{literal.language}'
+    if literal.datatype:
+        return f'"{escaped}"^^{format_iri(literal.datatype)}'
+    return f'"{escaped}"'
+
+class ChartWriter:
+    def __init__(self, triples_by_subject, concept_scale, language_scale):
+        self.table = triples_by_subject
+        self.concept_scale = concept_scale
+        self.language_scale = language_scale
+        self.concepts = {s for s, props in triples_by_subject.items() if SKOS_CONCEPT in props.get(RDF_TYPE, ())}
+        self.max_order = max((int(o) for props in triples_by_subject.values() for o in props.get(SH_ORDER, ())), default=0)
+
+    def rename(self, iri, copy):
+        # IRI of a concept in the given copy of the chart, other IRIs are unchanged
+        if copy and iri in self.concepts:
+            return f"{iri}Copy{copy}"
+        return iri
+
+    def format_object(self, obj, copy, indent):
+        if isinstance(obj, Literal):
+            return format_literal(obj)
+        if obj.startswith('_:'):
+            # time:hasBeginning / time:hasEnd blank nodes are written inline
+            lines = [f"{indent}    {format_iri(p)} {', '.join(self.format_object(o, copy, indent + '    ') for o in objs)}"
+                     for p, objs in self.table.get(obj, {}).items()]
+            return "[\n" + " ;\n".join(lines) + f"\n{indent}]"
+        return format_iri(self.rename(obj, copy))
+
+    def objects(self, subject, predicate, objs, copy):
+        if predicate == SKOS_MEMBER:
+            # Collections list the members of every copy
+            return [self.rename(o, c) for c in range(self.concept_scale) for o in objs]
+        if predicate == SH_ORDER and copy:
+            return [Literal(str(int(o) + copy * (self.max_order + 1)), datatype=o.datatype) for o in objs]
+        if predicate == SKOS_PREF_LABEL and copy:
+            return [Literal(f"{o} {copy}", language=o.language) for o in objs]
+        if predicate == SKOS_ALT_LABEL:
+            labels = []
+            for o in objs:
+                text = f"{o} {copy}" if copy else str(o)
+                labels.append(Literal(text, language=o.language))
+                for dialect in range(1, self.language_scale):
+                    labels.append(Literal(text, language=f"{o.language}-x-s{dialect}"))
+            return labels
+        return objs
+
+    def write_subject(self, f, subject, copy):
+        f.write(format_iri(self.rename(subject, copy)) + "\n")
+        for predicate, objs in self.table[subject].items():
+            name = 'a' if predicate == RDF_TYPE else format_iri(predicate)
+            formatted = [self.format_object(o, copy, '    ') for o in self.objects(subject, predicate, objs, copy)]
+            if len(formatted) == 1:
+                f.write(f"    {name} {formatted[0]} ;\n")
+            else:
+                f.write(f"    {name}\n        " + " ,\n        ".join(formatted) + " ;\n")
+        f.write(".\n\n")
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for prefix, namespace in PREFIXES:
+                f.write(f"PREFIX {prefix}: <{namespace}>\n")
+            f.write("\n")
+            for subject in self.table:
+                if subject.startswith('_:'):
+                    continue
+                copies = self.concept_scale if subject in self.concepts else 1
+                for copy in range(copies):
+                    self.write_subject(f, subject, copy)
+
+def generate_chart(path, concept_scale=1, language_scale=1, source=SOURCE_TTL):
+    triples_by_subject, _ = read_ttl(source)
+    ChartWriter(triples_by_subject, concept_scale, language_scale).write(path)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic, scaled version of the ICS chart TTL file")
+    parser.add_argument('output')
+    parser.add_argument('--concept-scale', type=int, default=1, help="number of copies of every concept")
+    parser.add_argument('--language-scale', type=int, default=1, help="multiplier of the number of altLabel languages")
+    parser.add_argument('--source', default=SOURCE_TTL)
+    args = parser.parse_args()
+    generate_chart(args.output, args.concept_scale, args.language_scale, args.source)
+    print(f"Wrote {args.output}")
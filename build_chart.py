@@ -0,0 +1,115 @@
+#Script to build every output of the chart from one parse of the TTL file: the
+#hierarchy JSON files of converter.py, the translations/<lang>.json files of
+#extract_translations.py and, optionally, the hierarchy localized in every language.
+#The concepts are walked once, building their record and their translations together.
+import argparse
+import os
+from collections import defaultdict
+
+import converter
+import extract_translations
+from chart_cache import load_or_build
+from json_writer import DEFAULT_FORMAT, add_arguments, format_from_args, write_json
+
+SKOS = converter.SKOS
+
+def walk_concepts(triples_by_subject):
+    # One pass over the concepts: builds the record of every member of a chart
+    # collection and collects the translations of the labelled concepts
+    members = set()
+    collections = [collection for collection, _, _ in converter.COLLECTIONS]
+    collections += [collection for collection, _, _, _ in converter.SUBCOLLECTIONS]
+    for collection in collections:
+        collection_props = triples_by_subject.get(converter.ISCHART[collection], {})
+        members.update(str(uri) for uri in collection_props.get(SKOS.member, ()))
+
+    records_by_uri = {}
+    translations_by_language = defaultdict(dict)
+    found = 0
+    count = 0
+    for subject, props in triples_by_subject.items():
+        if not extract_translations.is_concept(props):
+            continue
+
+        if subject in members:
+            records_by_uri[subject] = converter.build_concept(subject, props, triples_by_subject)
+
+        if SKOS.prefLabel in props or SKOS.altLabel in props:
+            found += 1
+            label = extract_translations.english_label(props)
+            if label:
+                count += 1
+                extract_translations.add_translations(translations_by_language, props, label)
+
+    print(f"Found {found} geological time periods")
+    print(f"Processed {count} time periods with English labels")
+    return records_by_uri, dict(translations_by_language)
+
+def build_from_file(ttl_file, parser='auto'):
+    triples_by_subject = converter.read_triples(ttl_file, parser)
+    print(f"Loaded {converter.count_triples(triples_by_subject)} triples from {ttl_file}")
+
+    records_by_uri, translations_by_language = walk_concepts(triples_by_subject)
+    collections = converter.extract_collections(triples_by_subject, records_by_uri)
+    return collections, translations_by_language
+
+def localize(records, labels):
+    # Copy of nested records with the prefLabel translated with `labels`
+    # (English label -> translated label), keeping the English label when
+    # there's no translation
+    localized = []
+    for info in records:
+        record = dict(info)
+        if 'prefLabel' in record:
+            record['prefLabel'] = labels.get(record['prefLabel'], record['prefLabel'])
+        if 'children' in record:
+            record['children'] = localize(record['children'], labels)
+        localized.append(record)
+    return localized
+
+def write_localized(collections, translations_by_language, output_dir='', json_format=DEFAULT_FORMAT):
+    # One complete hierarchy per language
+    localized_dir = os.path.join(output_dir, 'localized')
+    os.makedirs(localized_dir, exist_ok=True)
+    for lang, labels in translations_by_language.items():
+        output_file = os.path.join(localized_dir, f"complete_hierarchy_{lang}.json")
+        write_json(localize(collections['supereons'], labels), output_file, json_format, ensure_ascii=False)
+    print(f"Saved the complete hierarchy in {len(translations_by_language)} languages to {localized_dir}")
+
+def load(ttl_file, use_cache=True, parser='auto'):
+    # Unchanged TTL files are not parsed again, the records and translations are
+    # loaded from the cache instead
+    if use_cache:
+        result, cached = load_or_build(ttl_file, 'pipeline', lambda: build_from_file(ttl_file, parser))
+        if cached:
+            print(f"Loaded cached records and translations for {ttl_file}")
+        return result
+    return build_from_file(ttl_file, parser)
+
+def build(ttl_file, use_cache=True, parser='auto', output_dir='', translations_dir=None,
+          localized=False, normalized=False, incremental=False, json_format=DEFAULT_FORMAT):
+    collections, translations_by_language = load(ttl_file, use_cache, parser)
+    converter.write_collections(collections, ttl_file, normalized, incremental, output_dir, json_format)
+    if translations_dir is None:
+        translations_dir = os.path.join(output_dir, 'translations')
+    extract_translations.write_translations(translations_by_language, translations_dir, json_format)
+    if localized:
+        write_localized(collections, translations_by_language, output_dir, json_format)
+    return collections, translations_by_language
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the hierarchy JSON files and the translations from one parse of the chart")
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--output-dir', default='', help="directory for the output files (default: current directory)")
+    parser.add_argument('--translations-dir', default=None, help="directory for the translations (default: <output-dir>/translations)")
+    parser.add_argument('--localized', action='store_true', help="also write the complete hierarchy localized in every language")
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=converter.PARSERS, default='auto')
+    parser.add_argument('--normalized', action='store_true', help="write chart_normalized.json instead of the nested files")
+    parser.add_argument('--incremental', action='store_true', help="only rewrite the hierarchy files whose concepts changed")
+    add_arguments(parser)
+    args = parser.parse_args()
+    build(args.ttl_file, use_cache=not args.no_cache, parser=args.parser, output_dir=args.output_dir,
+          translations_dir=args.translations_dir, localized=args.localized, normalized=args.normalized,
+          incremental=args.incremental, json_format=format_from_args(parser, args))
+    print("\nBuild completed!")
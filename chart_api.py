@@ -0,0 +1,233 @@
+#Object model of the chart: a Chart of Unit objects linked to their parent and children
+#
+#Units use __slots__ instead of the nested dicts of the converter, so many versions of
+#the chart can be held in memory at once, and every unit is stored once however many
+#collections list it (Pridoli is both an age and an epoch). Charts are loaded lazily:
+#creating one only records where it comes from, the units are built on first use.
+#
+#    chart = Chart.from_ttl('ChronostratChart2024-12.ttl')    # nothing is read yet
+#    unit = chart['Maastrichtian']
+#    unit.parent.name, unit.duration, [u.name for u in unit.ancestors]
+#    chart.unit_at(66.5, 'epochs').name
+#
+#Loading from a TTL file goes through the converter cache, and rdflib is only imported
+#when the streaming reader can't read the file.
+import json
+from bisect import bisect_left
+
+# Fields of the converter records stored on the units
+FIELDS = ('name', 'prefLabel', 'rank', 'ratifiedGSSP', 'isDefinedBy', 'definition', 'broader', 'notation',
+          'beginning', 'beginning_error', 'ending', 'ending_error', 'derivedFrom', 'order', 'color')
+
+class _cached:
+    # Property computed once and stored in the slot named '_<name>' (functools.cached_property
+    # needs an instance __dict__, which units don't have)
+    def __init__(self, function):
+        self.function = function
+        self.slot = '_' + function.__name__
+        self.__doc__ = function.__doc__
+
+    def __get__(self, unit, owner=None):
+        if unit is None:
+            return self
+        try:
+            return getattr(unit, self.slot)
+        except AttributeError:
+            value = self.function(unit)
+            setattr(unit, self.slot, value)
+            return value
+
+class Unit:
+    # left/right: Euler-tour numbering of the unit in the chart tree, whose units in
+    # preorder are `tree` (see converter.tree_intervals)
+    __slots__ = FIELDS + ('parent', 'children', 'left', 'right', 'tree', '_duration', '_midpoint', '_ancestors')
+
+    def __init__(self, record):
+        for field in FIELDS:
+            setattr(self, field, record.get(field))
+        self.parent = None
+        self.children = ()
+        self.left = self.right = None
+        self.tree = ()
+
+    def __repr__(self):
+        return f"<Unit {self.name} ({self.rank}, {self.beginning}-{self.ending} Ma)>"
+
+    @_cached
+    def duration(self):
+        # In millions of years, None without boundaries
+        if self.beginning is None or self.ending is None:
+            return None
+        return self.beginning - self.ending
+
+    @_cached
+    def midpoint(self):
+        if self.beginning is None or self.ending is None:
+            return None
+        return (self.beginning + self.ending) / 2
+
+    @_cached
+    def ancestors(self):
+        # Units above this one, from the parent up
+        ancestors = []
+        unit = self.parent
+        while unit is not None:
+            ancestors.append(unit)
+            unit = unit.parent
+        return tuple(ancestors)
+
+    def descendants(self):
+        # Units below this one, depth first in chart order: a slice of the tree
+        return self.tree[self.left + 1:self.right]
+
+    def siblings(self):
+        if self.parent is None:
+            return ()
+        return tuple(unit for unit in self.parent.children if unit is not self)
+
+    def path(self):
+        # Names from the top of the hierarchy down to this unit
+        return [unit.name for unit in reversed(self.ancestors)] + [self.name]
+
+    def contains(self, age):
+        # Same convention as chart_query.py: ending < age <= beginning, and 0
+        # belongs to the youngest units
+        if self.beginning is None or self.ending is None:
+            return False
+        return (self.ending < age or age == self.ending == 0) and age <= self.beginning
+
+    def is_ancestor_of(self, unit):
+        return self.left < unit.left < self.right
+
+    def to_dict(self):
+        # Flat record, with the children as names as in chart_normalized.json
+        record = {field: getattr(self, field) for field in FIELDS if getattr(self, field) is not None}
+        record['children'] = [unit.name for unit in self.children]
+        return record
+
+class Chart:
+    def __init__(self, load):
+        # load() returns the normalized chart ({'collections': ..., 'concepts': ...});
+        # it is called on first use
+        self._load = load
+        self._units = None
+        self._collections = None
+        self._by_notation = None
+        self._boundaries = {}
+
+    @classmethod
+    def from_ttl(cls, ttl_file, use_cache=True, parser='auto'):
+        def load():
+            from converter import load_collections, normalize_collections
+            return normalize_collections(load_collections(ttl_file, use_cache, parser))
+        return cls(load)
+
+    @classmethod
+    def from_normalized(cls, path='chart_normalized.json'):
+        # File written by `converter.py --normalized`
+        def load():
+            with open(path) as f:
+                return json.load(f)
+        return cls(load)
+
+    @classmethod
+    def from_collections(cls, collections):
+        # Records as built by the converter
+        def load():
+            from converter import normalize_collections
+            return normalize_collections(collections)
+        return cls(load)
+
+    def _ensure_loaded(self):
+        if self._units is not None:
+            return
+        data = self._load()
+        self._load = None
+        units = {name: Unit(record) for name, record in data['concepts'].items()}
+        # Files written before the tree numbering was added don't have it
+        if 'tree' in data:
+            tree = data['tree']
+        else:
+            from converter import tree_intervals
+            tree = tree_intervals(data['concepts'], data['collections'])
+        preorder = tuple(units[name] for name in tree)
+        # The parent of a unit is the innermost unit enclosing it in the tree, which
+        # is its broader unit, through the sub-periods for the Carboniferous epochs
+        children = {}
+        enclosing = []
+        for unit in preorder:
+            unit.left, unit.right = tree[unit.name]
+            unit.tree = preorder
+            while enclosing and enclosing[-1].right <= unit.left:
+                enclosing.pop()
+            if enclosing:
+                unit.parent = enclosing[-1]
+                children.setdefault(unit.parent.name, []).append(unit)
+            enclosing.append(unit)
+        for name, units_below in children.items():
+            units[name].children = tuple(units_below)
+
+        self._units = units
+        self._collections = {key: tuple(units[name] for name in names) for key, names in data['collections'].items()}
+
+    @property
+    def loaded(self):
+        return self._units is not None
+
+    @property
+    def units(self):
+        # Name -> Unit, every unit once
+        self._ensure_loaded()
+        return self._units
+
+    def __getitem__(self, name):
+        return self.units[name]
+
+    def __contains__(self, name):
+        return name in self.units
+
+    def __iter__(self):
+        return iter(self.units.values())
+
+    def __len__(self):
+        return len(self.units)
+
+    def get(self, name, default=None):
+        return self.units.get(name, default)
+
+    def collection(self, key):
+        # Units of a collection (ages ... supereons) in chart order
+        self._ensure_loaded()
+        return self._collections[key]
+
+    def collections(self):
+        self._ensure_loaded()
+        return list(self._collections)
+
+    def roots(self):
+        # Units with children but without a parent in the chart: Precambrian and Phanerozoic
+        return [unit for unit in self if unit.parent is None and unit.children]
+
+    def by_notation(self, notation):
+        if self._by_notation is None:
+            self._by_notation = {unit.notation: unit for unit in self if unit.notation is not None}
+        return self._by_notation.get(notation)
+
+    def is_within(self, name, ancestor):
+        # True when the unit `name` is below the unit `ancestor`, in constant time
+        return self[ancestor].is_ancestor_of(self[name])
+
+    def of_rank(self, rank):
+        return [unit for unit in self if unit.rank == rank]
+
+    def unit_at(self, age, key='ages'):
+        # Unit of the collection containing the age (in Ma), or None
+        if key not in self._boundaries:
+            units = sorted((unit for unit in self.collection(key) if unit.duration is not None),
+                           key=lambda unit: unit.beginning)
+            self._boundaries[key] = (units, [unit.beginning for unit in units])
+        units, beginnings = self._boundaries[key]
+        i = bisect_left(beginnings, age)
+        if i < len(units) and units[i].ending <= age:
+            return units[i]
+        return None
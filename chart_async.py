@@ -0,0 +1,200 @@
+#asyncio client for chart lookups by name, notation or age
+#
+#The chart is loaded in a worker thread, so the event loop never blocks on parsing.
+#Lookups made while a batch is pending are queued and answered together at the next
+#turn of the loop: ages are classified with one vectorized probe of the boundary
+#arrays (chart_query.RankIndex.positions), and identical concurrent lookups share a
+#single future. Lists of lookups (units(), units_at()) are probed directly, without a
+#future per key. A new chart version is loaded in the background and swapped in with
+#one assignment; every batch is answered from a single version.
+#
+#    client = await AsyncChartClient.from_ttl('ChronostratChart2024-12.ttl')
+#    await client.unit('Maastrichtian'), await client.unit_at(66.5, 'epochs')
+#    await client.units_at([66.5, 120.0, 300.0])
+#    watcher = asyncio.create_task(client.watch())    # reload when the file changes
+import asyncio
+import os
+
+from chart_cache import file_sha256
+from chart_loader import load_normalized
+from chart_query import AgeIndex
+from converter import load_collections, normalize_collections
+
+# Seconds between two checks of the chart file by watch()
+DEFAULT_WATCH_INTERVAL = 5.0
+
+# Lookups answered by one probe at most; larger batches are split
+DEFAULT_MAX_BATCH = 65536
+
+class ChartSnapshot:
+    # One version of the chart, never modified after it is built
+    def __init__(self, collections, version=''):
+        normalized = normalize_collections(collections)
+        self.concepts = normalized['concepts']
+        self.version = version
+        self.by_notation = {concept['notation']: concept for concept in self.concepts.values() if 'notation' in concept}
+        self.ages = AgeIndex(collections)
+
+    @classmethod
+    def from_ttl(cls, ttl_file, use_cache=True, parser='auto'):
+        return cls(load_collections(ttl_file, use_cache, parser), file_sha256(ttl_file))
+
+    @classmethod
+    def from_normalized(cls, path='chart_normalized.json'):
+        chart = load_normalized(path)
+        return cls({key: chart.collection(key) for key in chart.collections}, file_sha256(path))
+
+    def units(self, names):
+        return [self.concepts.get(name) for name in names]
+
+    def units_by_notation(self, notations):
+        return [self.by_notation.get(notation) for notation in notations]
+
+    def units_at(self, ages, key):
+        # Flat records of the units of collection `key` containing each age, None
+        # outside the chart
+        rank = self.ages.ranks[key]
+        return [self.concepts[rank.names[i]] if i >= 0 else None for i in rank.positions(ages).tolist()]
+
+class _Batcher:
+    # Pending lookups of one kind: key -> future, answered together by probe(snapshot, keys)
+    def __init__(self, client, probe):
+        self.client = client
+        self.probe = probe
+        self.pending = {}
+        self.scheduled = False
+
+    def lookup(self, key):
+        # Each caller awaits the shared future through a shield, so cancelling one
+        # caller doesn't cancel the lookup of the others
+        future = self.pending.get(key)
+        if future is None:
+            # Identical lookups made before the batch is answered share the future
+            future = self.pending[key] = asyncio.get_running_loop().create_future()
+            if not self.scheduled:
+                self.scheduled = True
+                asyncio.get_running_loop().call_soon(self.flush)
+        return asyncio.shield(future)
+
+    def flush(self):
+        pending, self.pending, self.scheduled = self.pending, {}, False
+        snapshot = self.client.snapshot
+        keys = list(pending)
+        for start in range(0, len(keys), self.client.max_batch):
+            part = keys[start:start + self.client.max_batch]
+            try:
+                results = self.probe(snapshot, part)
+            except Exception as e:
+                for key in part:
+                    if not pending[key].done():
+                        pending[key].set_exception(e)
+                continue
+            for key, result in zip(part, results):
+                if not pending[key].done():
+                    pending[key].set_result(result)
+
+class AsyncChartClient:
+    def __init__(self, load, path=None, max_batch=DEFAULT_MAX_BATCH):
+        # load() returns a ChartSnapshot, it is run in a worker thread; path is the
+        # file watched by watch()
+        self.load = load
+        self.path = path
+        self.max_batch = max_batch
+        self.snapshot = None
+        self._reloading = None
+        self._batchers = {}
+
+    @classmethod
+    async def from_ttl(cls, ttl_file, use_cache=True, parser='auto', **kwargs):
+        client = cls(lambda: ChartSnapshot.from_ttl(ttl_file, use_cache, parser), ttl_file, **kwargs)
+        await client.reload()
+        return client
+
+    @classmethod
+    async def from_normalized(cls, path='chart_normalized.json', **kwargs):
+        client = cls(lambda: ChartSnapshot.from_normalized(path), path, **kwargs)
+        await client.reload()
+        return client
+
+    @property
+    def version(self):
+        return self.snapshot.version if self.snapshot is not None else None
+
+    async def reload(self):
+        # Load the chart again in a worker thread and swap it in; concurrent calls
+        # share one load. On error the current version stays in use
+        if self._reloading is None:
+            self._reloading = asyncio.ensure_future(self._reload())
+            # Cleared when the load finishes, even if every caller was cancelled
+            self._reloading.add_done_callback(lambda _: setattr(self, '_reloading', None))
+        return await asyncio.shield(self._reloading)
+
+    async def _reload(self):
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, self.load)
+        self.snapshot = snapshot
+        return snapshot
+
+    async def watch(self, interval=DEFAULT_WATCH_INTERVAL):
+        # Reload whenever the modification time or size of the chart file changes;
+        # runs until cancelled
+        if self.path is None:
+            raise ValueError("This client has no file to watch")
+        stat = os.stat(self.path)
+        seen = (stat.st_mtime_ns, stat.st_size)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                # The file is being replaced
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == seen:
+                continue
+            seen = (stat.st_mtime_ns, stat.st_size)
+            try:
+                old_version = self.version
+                await self.reload()
+                if self.version != old_version:
+                    print(f"Reloaded {self.path} (version {self.version[:12]})")
+            except Exception as e:
+                print(f"Could not reload {self.path}: {e}")
+
+    def _lookup(self, kind, probe, key):
+        if self.snapshot is None:
+            raise RuntimeError("The chart is not loaded yet, await reload() first")
+        batcher = self._batchers.get(kind)
+        if batcher is None:
+            batcher = self._batchers[kind] = _Batcher(self, probe)
+        return batcher.lookup(key)
+
+    async def unit(self, name):
+        # Flat record of the unit (children as names), or None
+        return await self._lookup('name', ChartSnapshot.units, name)
+
+    async def unit_by_notation(self, notation):
+        return await self._lookup('notation', ChartSnapshot.units_by_notation, notation)
+
+    async def unit_at(self, age, key='ages'):
+        # Unit of collection `key` containing the age in Ma, or None
+        return await self._lookup(('age', key), lambda snapshot, ages: snapshot.units_at(ages, key), float(age))
+
+    async def _probe_all(self, probe, keys):
+        # Lists of keys are probed directly, a slice of max_batch keys at a time,
+        # yielding to the loop in between so that other handlers keep running
+        if self.snapshot is None:
+            raise RuntimeError("The chart is not loaded yet, await reload() first")
+        snapshot = self.snapshot
+        keys = list(keys)
+        results = []
+        for start in range(0, len(keys), self.max_batch):
+            if start:
+                await asyncio.sleep(0)
+            results.extend(probe(snapshot, keys[start:start + self.max_batch]))
+        return results
+
+    async def units(self, names):
+        return await self._probe_all(ChartSnapshot.units, names)
+
+    async def units_at(self, ages, key='ages'):
+        # unit_at() for a list or array of ages, in one vectorized probe
+        return await self._probe_all(lambda snapshot, ages: snapshot.units_at(ages, key), ages)
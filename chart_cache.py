@@ -0,0 +1,48 @@
+#Persistent on-disk cache for the records extracted from a chart TTL file
+import hashlib
+import os
+import pickle
+
+# Directory where the cached records are stored
+CACHE_DIR = '.chart_cache'
+
+# Bump this when the structure of the cached records changes, so that old
+# cache files are not loaded by newer code
+CACHE_VERSION = 2
+
+def file_sha256(path):
+    # Hash the file in chunks so that large charts are not read into memory at once
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_path(ttl_file, kind, cache_dir=CACHE_DIR):
+    # The cache file is keyed by the content of the TTL file, not by its name,
+    # so a changed chart always gets a new cache entry
+    digest = file_sha256(ttl_file)
+    return os.path.join(cache_dir, f"{kind}-v{CACHE_VERSION}-{digest}.pickle")
+
+def load_or_build(ttl_file, kind, build, cache_dir=CACHE_DIR):
+    # Return (records, True) when the records were found in the cache, otherwise
+    # build them with build(), store them and return (records, False)
+    path = cache_path(ttl_file, kind, cache_dir)
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f), True
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # A truncated or corrupted cache file is rebuilt below
+            pass
+
+    records = build()
+
+    # Write to a temporary file first so that concurrent runs never read a
+    # partially written cache file
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return records, False
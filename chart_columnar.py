@@ -0,0 +1,133 @@
+#Columnar export of the chart: one row per concept, one array per field
+#
+#The table is written as an uncompressed NumPy .npz file, or as an Arrow IPC
+#(Feather v2) file when pyarrow is installed. Both can be memory-mapped, so that
+#analytics and plotting workers read the columns without parsing any JSON:
+#    units = load_npz('chart_units.npz')                  # columns are np.memmap arrays
+#    table = pyarrow.ipc.open_file(pyarrow.memory_map('chart_units.arrow')).read_all()
+#
+#Columns: name, rank, parent (row of the broader concept, -1 when it is not in the table),
+#beginning, ending, beginning_error, ending_error (NaN when missing), order (-1 when
+#missing), color (0xRRGGBBAA as uint32, 0 when missing), notation, ratifiedGSSP, and
+#tree_left/tree_right, the Euler-tour numbering of converter.tree_intervals (a unit is
+#inside another when outer.tree_left < tree_left < outer.tree_right).
+import argparse
+import importlib.util
+import zipfile
+
+import numpy as np
+
+from converter import PARSERS, load_collections, normalize_collections
+
+# (column, NumPy dtype, value used when the record has no such field)
+COLUMNS = [
+    ('name', 'U', ''),
+    ('rank', 'U', ''),
+    ('parent', np.int32, -1),
+    ('beginning', np.float64, np.nan),
+    ('ending', np.float64, np.nan),
+    ('beginning_error', np.float64, np.nan),
+    ('ending_error', np.float64, np.nan),
+    ('order', np.int32, -1),
+    ('color', np.uint32, 0),
+    ('notation', 'U', ''),
+    ('ratifiedGSSP', np.bool_, False),
+    ('tree_left', np.int32, -1),
+    ('tree_right', np.int32, -1),
+]
+
+FORMATS = ('npz', 'arrow')
+
+def color_to_uint32(color):
+    # '#RRGGBB' -> 0xRRGGBBFF; the alpha byte tells an actual black from a missing colour
+    if not color:
+        return 0
+    return (int(color.lstrip('#'), 16) << 8) | 0xFF
+
+def uint32_to_color(value):
+    return f"#{int(value) >> 8:06X}" if value else None
+
+def chart_columns(collections):
+    # Arrays of the table, in the order of the normalized concepts (every concept
+    # once, from the ages up to the super-eons)
+    normalized = normalize_collections(collections)
+    concepts = list(normalized['concepts'].values())
+    tree = normalized['tree']
+    row_of = {concept['name']: row for row, concept in enumerate(concepts)}
+
+    values = {column: [] for column, _, _ in COLUMNS}
+    for concept in concepts:
+        for column, _, missing in COLUMNS:
+            if column == 'parent':
+                value = row_of.get(concept.get('broader'), -1)
+            elif column in ('tree_left', 'tree_right'):
+                value = tree[concept['name']][column == 'tree_right'] if concept['name'] in tree else missing
+            elif column == 'color':
+                value = color_to_uint32(concept.get('color'))
+            else:
+                value = concept.get(column, missing)
+            values[column].append(value)
+
+    # Strings are stored as fixed-width unicode arrays, which can be memory-mapped
+    # (object arrays can't)
+    return {column: np.array(values[column], dtype=dtype) for column, dtype, _ in COLUMNS}
+
+def write_npz(columns, output_file):
+    # np.savez stores the arrays uncompressed, which load_npz() relies on
+    np.savez(output_file, **columns)
+
+def write_arrow(columns, output_file):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.table({column: pa.array(array.tolist() if array.dtype.kind == 'U' else array)
+                      for column, array in columns.items()})
+    # Uncompressed, so that the file can be memory-mapped
+    feather.write_feather(table, output_file, compression='uncompressed')
+
+def load_npz(path, mmap=True):
+    # Columns of an .npz table. With mmap=True every column is an np.memmap over
+    # its member of the (uncompressed) zip file, so nothing is read until used
+    if not mmap:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    columns = {}
+    with open(path, 'rb') as f, zipfile.ZipFile(f) as archive:
+        for member in archive.infolist():
+            if member.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and can't be memory-mapped")
+            # Skip the local file header to the start of the .npy data
+            f.seek(member.header_offset + 26)
+            name_length, extra_length = np.frombuffer(f.read(4), dtype='<u2')
+            f.seek(member.header_offset + 30 + int(name_length) + int(extra_length))
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = member.filename[:-len('.npy')] if member.filename.endswith('.npy') else member.filename
+            columns[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                      order='F' if fortran_order else 'C')
+    return columns
+
+def export(ttl_file, output_file=None, output_format='npz', use_cache=True, parser='auto'):
+    output_file = output_file or f"chart_units.{output_format}"
+    columns = chart_columns(load_collections(ttl_file, use_cache, parser))
+    if output_format == 'arrow':
+        write_arrow(columns, output_file)
+    else:
+        write_npz(columns, output_file)
+    print(f"Saved {len(columns['name'])} concepts in columnar form to {output_file}")
+    return output_file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the chart as a columnar table (NumPy .npz or Arrow IPC)")
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--format', choices=FORMATS, default='npz', help="npz (NumPy) or arrow (Feather v2, needs pyarrow)")
+    parser.add_argument('--output', help="output file (default: chart_units.<format>)")
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto')
+    args = parser.parse_args()
+    if args.format == 'arrow' and importlib.util.find_spec('pyarrow') is None:
+        parser.error("pyarrow is not installed, Arrow files can't be written (use --format npz)")
+    export(args.ttl_file, args.output, args.format, use_cache=not args.no_cache, parser=args.parser)
@@ -0,0 +1,80 @@
+#Loader for the normalized chart written by `converter.py --normalized`
+#
+#The normalized file stores every concept once, with its children as a list of
+#names. The nested records of ages_detailed.json ... complete_hierarchy.json are
+#rebuilt on demand, only for the collections that are actually used.
+import json
+
+from converter import COLLECTIONS, SUBCOLLECTIONS, tree_intervals
+
+# Output keys of the collections, from the smallest rank to the largest
+COLLECTION_KEYS = [key for _, key, _ in COLLECTIONS]
+
+# Key of each collection without an output file -> key of the collection of its children
+SUBCOLLECTION_CHILDREN = {key: children_key for _, key, _, children_key in SUBCOLLECTIONS}
+
+class NormalizedChart:
+    def __init__(self, data):
+        self.concepts = data['concepts']
+        self.collections = data['collections']
+        # Euler-tour numbering of the concept tree (name -> [left, right], in
+        # preorder), computed for files written before it was added
+        self.tree = data.get('tree') or tree_intervals(self.concepts, self.collections)
+        self._preorder = None
+        # Nested records already built, keyed by (name, level of the collection)
+        self._nested = {}
+
+    def concept(self, name):
+        return self.concepts[name]
+
+    def parent(self, name):
+        # Flat record of the broader concept, or None for the top of the hierarchy
+        broader = self.concepts[name].get('broader')
+        return self.concepts.get(broader) if broader else None
+
+    def children(self, name):
+        return [self.concepts[child] for child in self.concepts[name]['children']]
+
+    def is_within(self, name, ancestor):
+        # True when `name` is below `ancestor` in the hierarchy, in constant time
+        left = self.tree[name][0]
+        outer_left, outer_right = self.tree[ancestor]
+        return outer_left < left < outer_right
+
+    def descendants(self, name):
+        # Names of all the concepts below `name`, depth first: a slice of the preorder
+        if self._preorder is None:
+            self._preorder = list(self.tree)
+        left, right = self.tree[name]
+        return self._preorder[left + 1:right]
+
+    def nested(self, name, level):
+        # Nested record of a concept as it appears in the collection at `level`
+        # (0 for ages). Records are built once and shared, as in the converter
+        key = (name, level)
+        if key not in self._nested:
+            record = dict(self.concepts[name])
+            if level == 0:
+                # Ages don't have children
+                del record['children']
+            else:
+                record['children'] = [self.nested(child, level - 1) for child in record['children']]
+            self._nested[key] = record
+        return self._nested[key]
+
+    def collection(self, key):
+        # Same content as <key>_detailed.json, or the records of the sub-periods as
+        # built by the converter
+        if key in SUBCOLLECTION_CHILDREN:
+            level = COLLECTION_KEYS.index(SUBCOLLECTION_CHILDREN[key]) + 1
+        else:
+            level = COLLECTION_KEYS.index(key)
+        return [self.nested(name, level) for name in self.collections[key]]
+
+    def hierarchy(self):
+        # Same content as complete_hierarchy.json
+        return self.collection('supereons')
+
+def load_normalized(path='chart_normalized.json'):
+    with open(path) as f:
+        return NormalizedChart(json.load(f))
@@ -0,0 +1,251 @@
+#Monte Carlo realizations of the timescale from the boundary uncertainties
+#(beginning_error / ending_error, from sdo:marginOfError)
+#
+#Every distinct boundary age of the chart is drawn from a normal distribution whose
+#standard deviation is the largest error reported for it by the units that meet there
+#(as in chart_uncertainty.py). Units of every collection share their boundaries, so
+#Cretaceous and Berriasian start at the same age in each realization. The boundaries
+#of a realization are then sorted, which keeps them monotonic: every unit ends after
+#it begins and adjacent units never overlap.
+#
+#Realizations are drawn in blocks of NumPy arrays (realizations x boundaries), each
+#block from its own stream spawned from one seed, so a run gives the same result
+#whatever the number of worker processes. Blocks only add to fixed-size accumulators:
+#    durations  mean, standard deviation and quantiles (from a histogram of each unit)
+#    overlaps   probability that each unit overlaps each of the given intervals
+#    rates      count / duration, for per-unit counts (originations, extinctions, ...):
+#               mean from E[1/duration], quantiles from those of the durations
+#
+#Usage: python chart_montecarlo.py [TTL file] [-n 100000] [--seed 0] [--jobs 4] [--interval 60 70]
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from converter import PARSERS, load_collections, normalize_collections
+
+DEFAULT_REALIZATIONS = 100000
+
+# Realizations drawn at once by a task
+DEFAULT_BLOCK_SIZE = 8192
+
+# Bins of the duration histogram of each unit, over +-HISTOGRAM_SIGMAS standard
+# deviations of the nominal duration
+HISTOGRAM_BINS = 1024
+HISTOGRAM_SIGMAS = 8
+
+QUANTILES = (0.025, 0.25, 0.5, 0.75, 0.975)
+
+class TimescaleModel:
+    def __init__(self, collections):
+        # Units with both boundaries, every unit once
+        concepts = normalize_collections(collections)['concepts']
+        units = [concept for concept in concepts.values()
+                 if concept.get('beginning') is not None and concept.get('ending') is not None]
+        errors = {}
+        for unit in units:
+            for age_key, error_key in (('beginning', 'beginning_error'), ('ending', 'ending_error')):
+                boundary = unit[age_key]
+                errors[boundary] = max(errors.get(boundary, 0.0), unit.get(error_key, 0.0))
+
+        self.names = [unit['name'] for unit in units]
+        self.boundaries = np.array(sorted(errors), dtype=np.float64)
+        self.errors = np.array([errors[b] for b in self.boundaries.tolist()], dtype=np.float64)
+        self.beginning_positions = np.searchsorted(self.boundaries, [unit['beginning'] for unit in units])
+        self.ending_positions = np.searchsorted(self.boundaries, [unit['ending'] for unit in units])
+
+        self.durations = self.boundaries[self.beginning_positions] - self.boundaries[self.ending_positions]
+        sigma = np.hypot(self.errors[self.beginning_positions], self.errors[self.ending_positions])
+        spread = np.maximum(HISTOGRAM_SIGMAS * sigma, 1e-9)
+        self.histogram_low = self.durations - spread
+        self.histogram_width = 2 * spread / HISTOGRAM_BINS
+
+    @classmethod
+    def from_ttl(cls, ttl_file, use_cache=True, parser='auto'):
+        return cls(load_collections(ttl_file, use_cache, parser))
+
+    def draw(self, rng, size):
+        # Boundary ages of `size` realizations: array (size, boundaries), sorted along rows
+        realizations = self.boundaries + rng.standard_normal((size, len(self.boundaries))) * self.errors
+        realizations.sort(axis=1)
+        return realizations
+
+    def accumulate(self, seed, size, intervals=None):
+        # Accumulators of one block of realizations drawn from the stream `seed`
+        # (a numpy.random.SeedSequence)
+        realizations = self.draw(np.random.default_rng(seed), size)
+        beginnings = realizations[:, self.beginning_positions]
+        endings = realizations[:, self.ending_positions]
+        durations = beginnings - endings
+
+        units = len(self.names)
+        bins = np.floor((durations - self.histogram_low) / self.histogram_width).astype(np.intp)
+        np.clip(bins, 0, HISTOGRAM_BINS - 1, out=bins)
+        bins += np.arange(units) * HISTOGRAM_BINS
+        histogram = np.bincount(bins.ravel(), minlength=units * HISTOGRAM_BINS).reshape(units, HISTOGRAM_BINS)
+
+        with np.errstate(divide='ignore'):
+            inverse = 1.0 / durations
+        result = {
+            'count': size,
+            'sum': durations.sum(axis=0),
+            'sum_squares': np.square(durations).sum(axis=0),
+            'sum_inverse': inverse.sum(axis=0),
+            'histogram': histogram,
+        }
+        if intervals is not None and len(intervals):
+            # Unit interval (ending, beginning] overlapping [young, old], as in chart_query.py
+            result['overlaps'] = np.stack([((endings < old) & (beginnings >= young)).sum(axis=0)
+                                           for young, old in intervals])
+        return result
+
+    def summarize(self, totals, intervals=None):
+        count = totals['count']
+        mean = totals['sum'] / count
+        variance = np.maximum(totals['sum_squares'] / count - mean ** 2, 0.0)
+        histogram = totals['histogram'] / count
+        cumulative = np.cumsum(histogram, axis=1)
+        rows = np.arange(len(self.names))
+        quantiles = {}
+        for q in QUANTILES:
+            # Interpolated inside the first bin reaching the quantile
+            bins = np.argmax(cumulative >= q, axis=1)
+            inside = histogram[rows, bins]
+            before = cumulative[rows, bins] - inside
+            fraction = np.divide(q - before, inside, out=np.ones_like(inside), where=inside > 0)
+            quantiles[q] = self.histogram_low + (bins + fraction) * self.histogram_width
+        return MonteCarloResult(self.names, self.durations, count, mean, np.sqrt(variance), quantiles,
+                                totals['sum_inverse'] / count, intervals,
+                                totals['overlaps'] / count if 'overlaps' in totals else None)
+
+class MonteCarloResult:
+    def __init__(self, names, nominal, realizations, mean, std, quantiles, mean_inverse, intervals, overlaps):
+        self.names = names
+        self.nominal = nominal
+        self.realizations = realizations
+        self.mean = mean
+        self.std = std
+        # Quantile -> array of the duration quantile of every unit
+        self.quantiles = quantiles
+        self.mean_inverse = mean_inverse
+        self.intervals = intervals
+        # Array (intervals, units) of overlap probabilities, or None
+        self.overlaps = overlaps
+
+    def durations(self):
+        # Name -> summary of the duration distribution (Myr)
+        return {name: {'nominal': float(self.nominal[i]), 'mean': float(self.mean[i]), 'std': float(self.std[i]),
+                       'quantiles': {str(q): float(values[i]) for q, values in self.quantiles.items()}}
+                for i, name in enumerate(self.names)}
+
+    def overlap_probabilities(self, min_probability=0.0):
+        # One dict per interval: name -> probability that the unit overlaps it
+        if self.overlaps is None:
+            return []
+        return [{name: float(p) for name, p in zip(self.names, row) if p > min_probability} for row in self.overlaps]
+
+    def rates(self, counts):
+        # Rate distribution of per-unit counts (name -> count) normalized by the
+        # duration: count / duration per Myr. The quantiles are those of the durations
+        # in reverse order, since the rate decreases with the duration
+        index = {name: i for i, name in enumerate(self.names)}
+        rates = {}
+        for name, count in counts.items():
+            i = index[name]
+            rates[name] = {
+                'count': count,
+                'nominal': count / self.nominal[i] if self.nominal[i] else float('inf'),
+                'mean': float(count * self.mean_inverse[i]),
+                'quantiles': {str(q): float(count / self.quantiles[round(1 - q, 6)][i]) for q in self.quantiles},
+            }
+        return rates
+
+    def to_dict(self, counts=None):
+        data = {'realizations': self.realizations, 'durations': self.durations()}
+        if self.overlaps is not None:
+            data['overlaps'] = [{'young': young, 'old': old, 'probabilities': probabilities}
+                                for (young, old), probabilities in zip(self.intervals, self.overlap_probabilities())]
+        if counts:
+            data['rates'] = self.rates(counts)
+        return data
+
+# Model of each worker process, set once by the pool initializer
+_worker_model = None
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+def _accumulate_in_worker(seed, size, intervals):
+    return _worker_model.accumulate(seed, size, intervals)
+
+def add_totals(totals, block):
+    if totals is None:
+        return block
+    for key, value in block.items():
+        totals[key] = totals[key] + value
+    return totals
+
+def simulate(model, realizations=DEFAULT_REALIZATIONS, seed=0, jobs=None, block_size=DEFAULT_BLOCK_SIZE, intervals=None):
+    # Draw the realizations in blocks, each from its own stream spawned from the seed
+    blocks = [min(block_size, realizations - start) for start in range(0, realizations, block_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    intervals = [tuple(map(float, interval)) for interval in intervals] if intervals else None
+    jobs = min(jobs or os.cpu_count() or 1, len(blocks))
+
+    totals = None
+    if jobs <= 1:
+        for block_seed, size in zip(seeds, blocks):
+            totals = add_totals(totals, model.accumulate(block_seed, size, intervals))
+    else:
+        with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(model,)) as pool:
+            for block in pool.map(_accumulate_in_worker, seeds, blocks, [intervals] * len(blocks)):
+                totals = add_totals(totals, block)
+    return model.summarize(totals, intervals)
+
+def read_counts(path):
+    # CSV file of name,count lines (a header line is skipped)
+    import csv
+
+    counts = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if len(row) >= 2:
+                try:
+                    counts[row[0]] = float(row[1])
+                except ValueError:
+                    continue
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo realizations of the timescale from the boundary uncertainties")
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('-n', '--realizations', type=int, default=DEFAULT_REALIZATIONS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', '-j', type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE, help="realizations drawn at once by a task")
+    parser.add_argument('--interval', nargs=2, type=float, action='append', metavar=('YOUNG', 'OLD'),
+                        help="report the probability that each unit overlaps this interval (Ma); repeatable")
+    parser.add_argument('--counts', help="CSV file of unit name,count to normalize by the durations")
+    parser.add_argument('--output', default='timescale_montecarlo.json')
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto')
+    args = parser.parse_args()
+    if args.realizations < 1 or args.block_size < 1:
+        parser.error("--realizations and --block-size must be at least 1")
+    for young, old in args.interval or ():
+        if young > old:
+            parser.error(f"Interval {young} {old}: YOUNG must not be older than OLD")
+
+    model = TimescaleModel.from_ttl(args.ttl_file, use_cache=not args.no_cache, parser=args.parser)
+    counts = read_counts(args.counts) if args.counts else None
+    if counts:
+        unknown = sorted(set(counts) - set(model.names))
+        if unknown:
+            parser.error(f"Unknown units in {args.counts}: {', '.join(unknown)}")
+    result = simulate(model, args.realizations, args.seed, args.jobs, args.block_size, args.interval)
+    with open(args.output, 'w') as f:
+        json.dump(result.to_dict(counts), f, indent=2)
+    print(f"Saved {args.realizations} realizations of {len(model.names)} units to {args.output}")
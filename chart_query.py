@@ -0,0 +1,101 @@
+#Sorted-boundary index for "which unit contains X Ma" queries over the converted chart
+#
+#For every collection (ages ... supereons) the units are sorted by their beginning,
+#so the unit containing an age is found with one bisect. A unit contains the ages
+#ending < age <= beginning: the age of a boundary belongs to the unit that starts
+#there (66.0 Ma is Danian, not Maastrichtian), and 0 belongs to the youngest unit.
+import json
+import os
+from bisect import bisect_left
+
+from chart_loader import COLLECTION_KEYS, load_normalized
+
+class RankIndex:
+    # Boundaries of the units of one collection, sorted from the youngest unit
+    def __init__(self, records):
+        units = sorted((info for info in records if 'beginning' in info and 'ending' in info),
+                       key=lambda info: info['beginning'])
+        self.units = units
+        self.names = [info['name'] for info in units]
+        self.beginnings = [info['beginning'] for info in units]
+        self.endings = [info['ending'] for info in units]
+        # NumPy copies of the boundaries, created on the first batch query
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.units)
+
+    def position(self, age):
+        # Position of the unit containing `age` in self.units, or -1
+        i = bisect_left(self.beginnings, age)
+        if i < len(self.units) and self.endings[i] <= age:
+            return i
+        return -1
+
+    def unit_at(self, age):
+        i = self.position(age)
+        return self.units[i] if i >= 0 else None
+
+    def arrays(self):
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = (np.asarray(self.beginnings, dtype=np.float64),
+                            np.asarray(self.endings, dtype=np.float64))
+        return self._arrays
+
+    def positions(self, ages):
+        # Vectorized position(): positions of the units containing each age, -1
+        # for ages outside every unit (including NaN)
+        import numpy as np
+        beginnings, endings = self.arrays()
+        ages = np.asarray(ages, dtype=np.float64)
+        if not len(beginnings):
+            return np.full(ages.shape, -1, dtype=np.intp)
+        idx = np.searchsorted(beginnings, ages, side='left')
+        found = idx < len(beginnings)
+        clipped = np.minimum(idx, len(beginnings) - 1)
+        found &= endings[clipped] <= ages
+        return np.where(found, idx, -1)
+
+class AgeIndex:
+    def __init__(self, collections):
+        # collections: output key -> list of records, as built by the converter
+        self.ranks = {key: RankIndex(collections.get(key, ())) for key in COLLECTION_KEYS}
+
+    @classmethod
+    def from_detailed_files(cls, directory='.'):
+        # Load the <key>_detailed.json files written by the converter
+        collections = {}
+        for key in COLLECTION_KEYS:
+            with open(os.path.join(directory, f'{key}_detailed.json')) as f:
+                collections[key] = json.load(f)
+        return cls(collections)
+
+    @classmethod
+    def from_normalized(cls, path='chart_normalized.json'):
+        # Load the flat file written by `converter.py --normalized`
+        chart = load_normalized(path)
+        return cls({key: [chart.concept(name) for name in chart.collections[key]] for key in COLLECTION_KEYS})
+
+    def unit_at(self, age, key):
+        # Record of the unit of collection `key` containing `age` (in Ma), or None
+        return self.ranks[key].unit_at(age)
+
+    def chain(self, age):
+        # Units containing `age` in every collection, e.g.
+        # {'ages': {... 'Maastrichtian' ...}, 'epochs': {... 'UpperCretaceous' ...}, ...}
+        return {key: rank.unit_at(age) for key, rank in self.ranks.items()}
+
+    def classify(self, ages, key):
+        # Names of the units of collection `key` containing each age, as a NumPy
+        # array of strings ('' for ages outside the chart)
+        import numpy as np
+        rank = self.ranks[key]
+        positions = rank.positions(ages)
+        # Position -1 (not found) selects the trailing ''
+        names = np.array(rank.names + [''], dtype=object)
+        return names[positions]
+
+    def classify_chain(self, ages):
+        # classify() for every collection: output key -> array of names
+        return {key: self.classify(ages, key) for key in self.ranks}
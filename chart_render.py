@@ -0,0 +1,241 @@
+#Renderer of the standard ICS chart: an SVG file and PNG tiles at several zoom levels
+#
+#The layout is computed once from the collections (colour, order and boundaries of
+#every unit) and cached with the other records of the TTL file. A column per
+#collection, from the super-eons on the left to the ages on the right; a unit spans
+#the columns up to the first finer collection that subdivides it (Hadean, which has
+#no eras, spans the whole width), and Pridoli, both an epoch and an age, is drawn
+#once. Time runs from the top (present) down, on one of the TIME_SCALES; 'hybrid'
+#is linear over the Phanerozoic and logarithmic over the Precambrian, which would
+#otherwise take 90% of the height.
+#
+#The output directory gets layout.json (boxes in coordinates between 0 and 1, so
+#clients don't compute any layout), chart.svg and tiles/<zoom>/<x>/<y>.png. The tiles
+#only hold the coloured boxes; labels are in the SVG and in layout.json. Nothing is
+#rendered again when the TTL file and the options are the same as the last time.
+#
+#Usage: python chart_render.py [TTL file] [--output-dir chart_tiles] [--max-zoom 3] [--scale hybrid]
+import argparse
+import json
+import math
+import os
+import struct
+import zlib
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from chart_cache import file_sha256, load_or_build
+from converter import PARSERS, load_collections
+
+# Columns from left to right
+COLUMN_KEYS = ['supereons', 'eons', 'eras', 'periods', 'epochs', 'ages']
+
+TIME_SCALES = ('linear', 'log', 'hybrid')
+
+# Boundary between the Precambrian and the Phanerozoic (Ma), where the hybrid scale
+# changes from linear to logarithmic, and the share of the height it gives the Phanerozoic
+PHANEROZOIC_BEGINNING = 538.8
+DEFAULT_PHANEROZOIC_SHARE = 0.7
+
+# Size of the chart at zoom 0, in pixels, and of the PNG tiles
+DEFAULT_WIDTH = 512
+DEFAULT_HEIGHT = 2048
+TILE_SIZE = 256
+DEFAULT_MAX_ZOOM = 3
+
+# Labels are only drawn in boxes at least this tall, in pixels
+MIN_LABEL_HEIGHT = 8
+
+# Written to the output directory, to skip rendering an unchanged chart
+MANIFEST = 'render.json'
+
+def chart_layout(collections):
+    # Boxes of the units: name, label, rank, colour, the first and last column
+    # (exclusive) and the ages of the top (ending) and bottom (beginning)
+    columns = [[record for record in collections.get(key, ())
+                if record.get('beginning') is not None and record.get('ending') is not None]
+               for key in COLUMN_KEYS]
+
+    def subdivided(record, column):
+        # Whether units of the column other than the record overlap its interval
+        return any(unit['ending'] < record['beginning'] and unit['beginning'] > record['ending']
+                   and unit['name'] != record['name'] for unit in columns[column])
+
+    boxes = []
+    placed = set()
+    for column, records in enumerate(columns):
+        for record in sorted(records, key=lambda record: record['ending']):
+            if record['name'] in placed:
+                continue
+            placed.add(record['name'])
+            first = column
+            while first > 0 and not subdivided(record, first - 1):
+                first -= 1
+            last = column + 1
+            while last < len(columns) and not subdivided(record, last):
+                last += 1
+            boxes.append({
+                'name': record['name'],
+                'label': record.get('prefLabel', record['name']),
+                'rank': record.get('rank', ''),
+                'color': record.get('color') or '#FFFFFF',
+                'column': first,
+                'end_column': last,
+                'ending': record['ending'],
+                'beginning': record['beginning'],
+            })
+    return boxes
+
+def load_layout(ttl_file, use_cache=True, parser='auto'):
+    build = lambda: chart_layout(load_collections(ttl_file, use_cache, parser))
+    return load_or_build(ttl_file, 'layout', build)[0] if use_cache else build()
+
+def time_scale(scale, oldest, phanerozoic_share=DEFAULT_PHANEROZOIC_SHARE):
+    # Function mapping an age in Ma to a position between 0 (present) and 1 (oldest)
+    if scale == 'linear':
+        return lambda age: age / oldest
+    if scale == 'log':
+        # log(1 + age / 1 Ma), so that the present is at 0
+        total = math.log1p(oldest)
+        return lambda age: math.log1p(age) / total
+    if scale == 'hybrid':
+        boundary = PHANEROZOIC_BEGINNING
+        precambrian = math.log(oldest / boundary)
+
+        def position(age):
+            if age <= boundary:
+                return phanerozoic_share * age / boundary
+            return phanerozoic_share + (1 - phanerozoic_share) * math.log(age / boundary) / precambrian
+        return position
+    raise ValueError(f"Unknown time scale {scale!r}, expected one of {', '.join(TIME_SCALES)}")
+
+def scaled_layout(boxes, scale='hybrid', phanerozoic_share=DEFAULT_PHANEROZOIC_SHARE):
+    # Boxes with x0, x1, y0, y1 between 0 and 1, the form written to layout.json
+    position = time_scale(scale, max(box['beginning'] for box in boxes), phanerozoic_share)
+    columns = len(COLUMN_KEYS)
+    return [dict(box, x0=box['column'] / columns, x1=box['end_column'] / columns,
+                 y0=position(box['ending']), y1=position(box['beginning'])) for box in boxes]
+
+def text_color(color):
+    # Black or white, whichever reads better on the background colour
+    red, green, blue = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return '#000000' if 0.299 * red + 0.587 * green + 0.114 * blue > 140 else '#FFFFFF'
+
+def render_svg(layout, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}" font-family="sans-serif">']
+    for box in layout:
+        x, y = box['x0'] * width, box['y0'] * height
+        w, h = (box['x1'] - box['x0']) * width, (box['y1'] - box['y0']) * height
+        title = f"{box['label']} ({box['beginning']} - {box['ending']} Ma)"
+        lines.append(f'<rect x="{x:.2f}" y="{y:.2f}" width="{w:.2f}" height="{h:.2f}" fill="{box["color"]}" '
+                     f'stroke="#000000" stroke-width="0.5"><title>{escape(title)}</title></rect>')
+        if h >= MIN_LABEL_HEIGHT:
+            size = min(12, h * 0.8)
+            lines.append(f'<text x="{x + w / 2:.2f}" y="{y + h / 2:.2f}" font-size="{size:.1f}" '
+                         f'text-anchor="middle" dominant-baseline="central" fill="{text_color(box["color"])}">'
+                         f'{escape(box["label"])}</text>')
+    lines.append('</svg>')
+    return '\n'.join(lines) + '\n'
+
+def encode_png(pixels):
+    # PNG file of an (height, width, 4) uint8 RGBA array, without any imaging library
+    height, width, _ = pixels.shape
+    # Every row starts with filter type 0 (none)
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 4)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)) + chunk(b'IEND', b'')
+
+def render_tile(layout, zoom, x, y, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+    # Pixels of one tile: the chart at this zoom is (width, height) * 2 ** zoom pixels.
+    # Only the boxes crossing the tile are drawn, so a tile never needs the full image
+    full_width, full_height = width << zoom, height << zoom
+    left, top = x * TILE_SIZE, y * TILE_SIZE
+    tile = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+    for box in layout:
+        x0, x1 = round(box['x0'] * full_width) - left, round(box['x1'] * full_width) - left
+        y0, y1 = round(box['y0'] * full_height) - top, round(box['y1'] * full_height) - top
+        if x1 <= 0 or y1 <= 0 or x0 >= TILE_SIZE or y0 >= TILE_SIZE:
+            continue
+        # Boxes less than a pixel tall still get a line
+        y1 = max(y1, y0 + 1)
+        color = [int(box['color'][i:i + 2], 16) for i in (1, 3, 5)] + [255]
+        tile[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)] = color
+        # Top and left borders; the bottom and right ones are those of the next boxes
+        if 0 <= y0 < TILE_SIZE:
+            tile[y0, max(x0, 0):max(x1, 0)] = (0, 0, 0, 255)
+        if 0 <= x0 < TILE_SIZE:
+            tile[max(y0, 0):max(y1, 0), x0] = (0, 0, 0, 255)
+    return tile
+
+def write_tiles(layout, tiles_dir, max_zoom=DEFAULT_MAX_ZOOM, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+    # Returns the number of tiles written
+    count = 0
+    for zoom in range(max_zoom + 1):
+        columns = -(-(width << zoom) // TILE_SIZE)
+        rows = -(-(height << zoom) // TILE_SIZE)
+        for x in range(columns):
+            os.makedirs(os.path.join(tiles_dir, str(zoom), str(x)), exist_ok=True)
+            for y in range(rows):
+                with open(os.path.join(tiles_dir, str(zoom), str(x), f"{y}.png"), 'wb') as f:
+                    f.write(encode_png(render_tile(layout, zoom, x, y, width, height)))
+                count += 1
+    return count
+
+def render(ttl_file='ChronostratChart2024-12.ttl', output_dir='chart_tiles', scale='hybrid', max_zoom=DEFAULT_MAX_ZOOM,
+           width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, phanerozoic_share=DEFAULT_PHANEROZOIC_SHARE, png=True,
+           force=False, use_cache=True, parser='auto'):
+    # Returns False when the output directory was already up to date
+    manifest = {
+        'sha256': file_sha256(ttl_file),
+        'options': {'scale': scale, 'max_zoom': max_zoom if png else None, 'width': width, 'height': height,
+                    'phanerozoic_share': phanerozoic_share, 'tile_size': TILE_SIZE},
+    }
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) == manifest:
+                print(f"{output_dir} is up to date with {ttl_file}")
+                return False
+
+    layout = scaled_layout(load_layout(ttl_file, use_cache, parser), scale, phanerozoic_share)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'layout.json'), 'w') as f:
+        json.dump({'scale': scale, 'columns': COLUMN_KEYS, 'boxes': layout}, f, indent=2)
+    with open(os.path.join(output_dir, 'chart.svg'), 'w', encoding='utf-8') as f:
+        f.write(render_svg(layout, width, height))
+    print(f"Saved the layout of {len(layout)} units and the SVG chart to {output_dir}")
+    if png:
+        count = write_tiles(layout, os.path.join(output_dir, 'tiles'), max_zoom, width, height)
+        print(f"Saved {count} tiles of zoom 0 to {max_zoom} to {os.path.join(output_dir, 'tiles')}")
+
+    # Written last, so that an interrupted run is rendered again
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the chronostratigraphic chart as SVG and PNG tiles")
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--output-dir', default='chart_tiles')
+    parser.add_argument('--scale', choices=TIME_SCALES, default='hybrid',
+                        help="time axis: linear, log, or linear over the Phanerozoic and log over the Precambrian (default)")
+    parser.add_argument('--phanerozoic-share', type=float, default=DEFAULT_PHANEROZOIC_SHARE,
+                        help="share of the height given to the Phanerozoic by the hybrid scale")
+    parser.add_argument('--max-zoom', type=int, default=DEFAULT_MAX_ZOOM, help="tiles are rendered for zoom 0 to this")
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH, help="width of the chart at zoom 0, in pixels")
+    parser.add_argument('--height', type=int, default=DEFAULT_HEIGHT, help="height of the chart at zoom 0, in pixels")
+    parser.add_argument('--no-png', action='store_true', help="only write the layout and the SVG chart")
+    parser.add_argument('--force', action='store_true', help="render even if the output is up to date")
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto')
+    args = parser.parse_args()
+    if not 0 < args.phanerozoic_share < 1:
+        parser.error("--phanerozoic-share must be between 0 and 1")
+    render(args.ttl_file, args.output_dir, args.scale, args.max_zoom, args.width, args.height, args.phanerozoic_share,
+           png=not args.no_png, force=args.force, use_cache=not args.no_cache, parser=args.parser)
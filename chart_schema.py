@@ -0,0 +1,265 @@
+#Schema of the records written by the converter, and a validating loader for the
+#<key>_detailed.json and complete_hierarchy.json files
+#
+#SCHEMA is a JSON Schema (draft 2020-12) of one output file: an array of records whose
+#children are records too. It is published with `converter.py --schema`. Only the
+#name and ratifiedGSSP are always written by the converter; every other field is only
+#there when the TTL file has it (super-eons have no broader, many units have no
+#boundary errors), and services that need more ask for it with `require`.
+#
+#The validator is not an interpreter walking the schema: Python source is generated
+#from the schema once, compiled, and run over the records in a single pass, which also
+#checks the invariants between them:
+#    interval     ending < beginning, when both are given
+#    broader      a child names its parent as broader
+#    containment  a child's interval lies inside its parent's
+#    order        the records of a file are sorted by order
+#    overlap      consecutive records of a file don't overlap in time
+#
+#    collections = load_outputs('.', require=('beginning', 'ending'))
+#
+#Usage: python chart_schema.py [output dir] [--require beginning ending] [--tolerate overlap]
+#       [--emit-validator chart_validator.py]
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+
+from converter import COLLECTIONS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SCHEMA = {
+    '$schema': 'https://json-schema.org/draft/2020-12/schema',
+    '$id': 'chart_records.schema.json',
+    'title': "Records of a chronostratigraphic chart collection, as written by converter.py",
+    'type': 'array',
+    'items': {'$ref': '#/$defs/record'},
+    '$defs': {
+        'record': {
+            'type': 'object',
+            'required': ['name', 'ratifiedGSSP'],
+            'additionalProperties': False,
+            'properties': {
+                'name': {'type': 'string', 'description': "Last segment of the concept IRI"},
+                'prefLabel': {'type': 'string', 'description': "English preferred label"},
+                'rank': {'type': 'string', 'description': "Age, Epoch, Period, Era, Eon or Super-Eon"},
+                'ratifiedGSSP': {'type': 'boolean'},
+                'isDefinedBy': {'type': 'string'},
+                'definition': {'type': 'string'},
+                'broader': {'type': 'string', 'description': "Name of the parent concept"},
+                'notation': {'type': 'string'},
+                'beginning': {'type': 'number', 'minimum': 0, 'description': "Ma"},
+                'beginning_error': {'type': 'number', 'minimum': 0, 'description': "Myr"},
+                'ending': {'type': 'number', 'minimum': 0, 'description': "Ma"},
+                'ending_error': {'type': 'number', 'minimum': 0, 'description': "Myr"},
+                'derivedFrom': {'type': 'string'},
+                'order': {'type': 'integer'},
+                'color': {'type': 'string', 'pattern': '^#[0-9A-Fa-f]{6}$'},
+                'children': {'type': 'array', 'items': {'$ref': '#/$defs/record'}},
+            },
+        },
+    },
+}
+
+# Kinds of the problems found by the validator
+INVARIANTS = ('interval', 'broader', 'containment', 'order', 'overlap')
+PROBLEM_KINDS = ('schema',) + INVARIANTS
+
+# Boundaries closer than this (Ma) are equal for the invariants
+TOLERANCE = 1e-9
+
+# Python expression checking the JSON type of `value`
+_TYPE_CHECKS = {
+    'string': 'type(value) is str',
+    'number': '(type(value) is float or type(value) is int)',
+    'integer': 'type(value) is int',
+    'boolean': 'type(value) is bool',
+    'array': 'type(value) is list',
+    'object': 'type(value) is dict',
+}
+
+class ChartValidationError(ValueError):
+    def __init__(self, path, problems):
+        # problems: list of (location, kind, message)
+        shown = '\n'.join(f"  {location}: {message} ({kind})" for location, kind, message in problems[:20])
+        more = f"\n  ... and {len(problems) - 20} more" if len(problems) > 20 else ''
+        super().__init__(f"{path} is not a valid chart file:\n{shown}{more}")
+        self.path = path
+        self.problems = problems
+
+def validator_source(schema=SCHEMA, require=()):
+    # Source of a module defining validate(records, source) -> list of problems
+    record = schema['$defs']['record']
+    properties = record['properties']
+    required = sorted(set(record.get('required', ())) | set(require))
+    unknown = set(required) - set(properties)
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(sorted(unknown))}")
+
+    patterns = {}
+    checks = []
+    for field, spec in properties.items():
+        lines = [f"value = record.get({field!r}, MISSING)",
+                 "if value is not MISSING:",
+                 f"    if not {_TYPE_CHECKS[spec['type']]}:",
+                 f"        add((f'{{path}}[{{i}}].{field}', 'schema', {'expected ' + spec['type']!r}))"]
+        if 'pattern' in spec:
+            patterns[field] = spec['pattern']
+            lines += [f"    elif PATTERN_{field}.match(value) is None:",
+                      f"        add((f'{{path}}[{{i}}].{field}', 'schema', {'does not match ' + spec['pattern']!r}))"]
+        if 'minimum' in spec:
+            lines += [f"    elif value < {spec['minimum']!r}:",
+                      f"        add((f'{{path}}[{{i}}].{field}', 'schema', {'is below ' + str(spec['minimum'])!r}))"]
+        checks.extend(lines)
+    body = '\n'.join(' ' * 12 + line for line in checks)
+
+    return f'''# Generated by chart_schema.py from the schema of the converter records, do not edit
+import re
+
+MISSING = object()
+REQUIRED = frozenset({required!r})
+KNOWN = frozenset({sorted(properties)!r})
+TOLERANCE = {TOLERANCE!r}
+{''.join(f"PATTERN_{field} = re.compile({pattern!r})" + chr(10) for field, pattern in patterns.items())}
+def _number(value):
+    return type(value) is float or type(value) is int
+
+def validate(records, source):
+    # Problems as (location, kind, message), in one pass over the records
+    problems = []
+    add = problems.append
+    if type(records) is not list:
+        add((source, 'schema', 'expected an array of records'))
+        return problems
+    # (records, location, parent record, parent beginning, parent ending)
+    stack = [(records, source, None, None, None)]
+    while stack:
+        items, path, parent, parent_beginning, parent_ending = stack.pop()
+        previous_order = previous_beginning = None
+        for i, record in enumerate(items):
+            if type(record) is not dict:
+                add((f'{{path}}[{{i}}]', 'schema', 'expected an object'))
+                continue
+            keys = record.keys()
+            if not REQUIRED <= keys:
+                add((f'{{path}}[{{i}}]', 'schema', 'missing ' + ', '.join(sorted(REQUIRED - keys))))
+            if not keys <= KNOWN:
+                add((f'{{path}}[{{i}}]', 'schema', 'unknown ' + ', '.join(sorted(keys - KNOWN))))
+{body}
+
+            beginning = record.get('beginning')
+            ending = record.get('ending')
+            interval = _number(beginning) and _number(ending)
+            if interval and not ending < beginning:
+                add((f'{{path}}[{{i}}]', 'interval', f'ending {{ending}} is not younger than beginning {{beginning}}'))
+            if parent is not None:
+                if record.get('broader') != parent.get('name'):
+                    add((f'{{path}}[{{i}}]', 'broader', f"broader {{record.get('broader')!r}} is not the parent {{parent.get('name')!r}}"))
+                if interval and parent_beginning is not None and (
+                        beginning > parent_beginning + TOLERANCE or ending < parent_ending - TOLERANCE):
+                    add((f'{{path}}[{{i}}]', 'containment',
+                         f'{{ending}}-{{beginning}} Ma is outside the parent {{parent_ending}}-{{parent_beginning}} Ma'))
+            else:
+                order = record.get('order')
+                if type(order) is int:
+                    if previous_order is not None and order < previous_order:
+                        add((f'{{path}}[{{i}}]', 'order', f'order {{order}} after {{previous_order}}'))
+                    previous_order = order
+                if interval:
+                    if previous_beginning is not None and ending < previous_beginning - TOLERANCE:
+                        add((f'{{path}}[{{i}}]', 'overlap', f'{{record.get("name")}} ({{ending}}-{{beginning}} Ma) overlaps the previous unit, which begins at {{previous_beginning}} Ma'))
+                    previous_beginning = beginning
+
+            children = record.get('children')
+            if type(children) is list and children:
+                stack.append((children, f'{{path}}[{{i}}].children', record,
+                              beginning if interval else None, ending if interval else None))
+    return problems
+'''
+
+@lru_cache(maxsize=None)
+def compiled_validator(require=()):
+    # validate() compiled for these extra required fields; compiled once per process
+    namespace = {}
+    exec(compile(validator_source(SCHEMA, require), '<chart_schema validator>', 'exec'), namespace)
+    return namespace['validate']
+
+def validate(records, source='records', require=(), tolerate=()):
+    # Problems found in the records, except those of the kinds in `tolerate`
+    problems = compiled_validator(tuple(sorted(require)))(records, source)
+    return [problem for problem in problems if problem[1] not in tolerate] if tolerate else problems
+
+def read_json(path):
+    # .json or .json.gz (see json_writer.py)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def load_validated(path, require=(), tolerate=()):
+    # Records of one output file; raises ChartValidationError when they are invalid
+    records = read_json(path)
+    problems = validate(records, os.path.basename(path), require, tolerate)
+    if problems:
+        raise ChartValidationError(path, problems)
+    return records
+
+def output_files(directory='.'):
+    # Output key -> path of the files of the converter
+    files = {key: os.path.join(directory, f'{key}_detailed.json') for _, key, _ in COLLECTIONS}
+    files['complete_hierarchy'] = os.path.join(directory, 'complete_hierarchy.json')
+    return files
+
+def load_outputs(directory='.', require=(), tolerate=()):
+    return {key: load_validated(path, require, tolerate) for key, path in output_files(directory).items()}
+
+def write_schema(path='chart_records.schema.json'):
+    with open(path, 'w') as f:
+        json.dump(SCHEMA, f, indent=2)
+        f.write('\n')
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the JSON files written by converter.py against their schema")
+    parser.add_argument('directory', nargs='?', default='.', help="directory of the converter outputs")
+    parser.add_argument('--require', nargs='+', default=[], metavar='FIELD',
+                        help="fields that every record must have, besides name and ratifiedGSSP")
+    parser.add_argument('--tolerate', nargs='+', default=[], choices=PROBLEM_KINDS, metavar='KIND',
+                        help=f"kinds of problems to ignore ({', '.join(PROBLEM_KINDS)})")
+    parser.add_argument('--emit-validator', metavar='FILE', help="write the generated validator module and exit")
+    parser.add_argument('--schema', metavar='FILE', help="write the JSON Schema and exit")
+    args = parser.parse_args()
+
+    try:
+        if args.emit_validator:
+            with open(args.emit_validator, 'w') as f:
+                f.write(validator_source(SCHEMA, tuple(sorted(args.require))))
+            print(f"Saved the validator to {args.emit_validator}")
+            sys.exit()
+        if args.schema:
+            print(f"Saved the schema to {write_schema(args.schema)}")
+            sys.exit()
+        validator = compiled_validator(tuple(sorted(args.require)))
+    except ValueError as e:
+        parser.error(str(e))
+
+    failed = False
+    for key, path in output_files(args.directory).items():
+        start = time.perf_counter()
+        records = read_json(path)
+        loaded = time.perf_counter()
+        problems = validate(records, os.path.basename(path), args.require, args.tolerate)
+        validated = time.perf_counter()
+        status = f"{len(problems)} problems" if problems else "valid"
+        print(f"{path}: {status} (read {1000 * (loaded - start):.2f} ms, validated {1000 * (validated - loaded):.2f} ms)")
+        for location, kind, message in problems:
+            print(f"    {location}: {message} ({kind})")
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
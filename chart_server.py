@@ -0,0 +1,284 @@
+#Local HTTP query service over the converted chart
+#
+#The chart is loaded once (through the build_chart.py cache) into in-memory indexes
+#by name, notation, rank and time interval, and queried over HTTP:
+#    GET /                               chart information and the list of endpoints
+#    GET /units/<name>                   flat record of a unit (children as names)
+#    GET /units/<name>/ancestors         broader units, from the parent up
+#    GET /units/<name>/descendants       narrower units, depth first
+#    GET /notation/<code>                unit by its notation (e.g. /notation/c3)
+#    GET /ranks/<rank>                   units of a rank (e.g. /ranks/Age)
+#    GET /at?age=66.5                    unit of every collection containing the age (Ma)
+#    GET /overlapping?young=60&old=70    units overlapping the interval, &collection=ages to filter
+#    GET /labels/<lang>                  English label -> label in the language
+#    GET /search?q=Maastrichtium         units by label in any language (&lang=de, &fuzzy=1)
+#Unit endpoints accept ?lang=<lang> to get the prefLabel in that language.
+#
+#Every response carries an ETag derived from the TTL file, so clients can revalidate
+#with If-None-Match (304 Not Modified), and rendered responses are kept in an LRU cache.
+#
+#Usage: python chart_server.py [TTL file] [--host 127.0.0.1] [--port 8000]
+import argparse
+import json
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from build_chart import load
+from chart_cache import file_sha256
+from chart_loader import COLLECTION_KEYS
+from chart_query import AgeIndex
+from converter import PARSERS, normalize_collections
+from label_index import LabelIndex
+
+# Number of rendered responses kept in memory
+DEFAULT_CACHE_SIZE = 4096
+
+class QueryError(Exception):
+    # Request that can't be answered: HTTP status and message
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ChartIndex:
+    def __init__(self, collections, translations_by_language, version='', label_index=None):
+        normalized = normalize_collections(collections)
+        self.concepts = normalized['concepts']
+        self.collections = normalized['collections']
+        # Euler-tour numbering of the tree and the names in preorder, see converter.tree_intervals
+        self.tree = normalized['tree']
+        self.preorder = list(self.tree)
+        self.translations = translations_by_language
+        self.version = version
+        self.label_index = label_index
+
+        self.by_notation = {concept['notation']: concept for concept in self.concepts.values() if 'notation' in concept}
+        self.by_rank = defaultdict(list)
+        for concept in self.concepts.values():
+            self.by_rank[concept.get('rank', '')].append(concept)
+        self.ages = AgeIndex(collections)
+
+    @classmethod
+    def from_file(cls, ttl_file, use_cache=True, parser='auto'):
+        collections, translations_by_language = load(ttl_file, use_cache, parser)
+        return cls(collections, translations_by_language, file_sha256(ttl_file),
+                   LabelIndex.from_file(ttl_file, use_cache, parser))
+
+    def unit(self, name):
+        if name not in self.concepts:
+            raise QueryError(404, f"Unknown unit {name!r}")
+        return self.concepts[name]
+
+    def unit_by_notation(self, notation):
+        if notation not in self.by_notation:
+            raise QueryError(404, f"Unknown notation {notation!r}")
+        return self.by_notation[notation]
+
+    def units_of_rank(self, rank):
+        if rank not in self.by_rank:
+            raise QueryError(404, f"Unknown rank {rank!r}")
+        return self.by_rank[rank]
+
+    def ancestors(self, name):
+        # Broader units that are in the chart, from the parent up
+        ancestors = []
+        broader = self.unit(name).get('broader')
+        while broader in self.concepts:
+            ancestors.append(self.concepts[broader])
+            broader = self.concepts[broader].get('broader')
+        return ancestors
+
+    def descendants(self, name):
+        # Narrower units, depth first in chart order: a slice of the tree
+        self.unit(name)
+        left, right = self.tree[name]
+        return [self.concepts[descendant] for descendant in self.preorder[left + 1:right]]
+
+    def at(self, age):
+        # Unit of every collection containing the age, None outside the collection
+        return {key: self.concepts[unit['name']] if unit else None for key, unit in self.ages.chain(age).items()}
+
+    def overlapping(self, young, old, keys=COLLECTION_KEYS):
+        # Units whose interval (ending, beginning] overlaps [young, old]: with young
+        # == old this is the unit containing the age, as in chart_query.py
+        result = {}
+        for key in keys:
+            rank = self.ages.ranks[key]
+            start = bisect_left(rank.beginnings, young)
+            result[key] = [self.concepts[name] for name, ending in zip(rank.names[start:], rank.endings[start:])
+                           if ending < old]
+        return result
+
+    def labels(self, lang):
+        if lang not in self.translations:
+            raise QueryError(404, f"No labels in language {lang!r}")
+        return self.translations[lang]
+
+    def search(self, text, lang=None, fuzzy=False):
+        # Units whose label matches the text, with the matched label and score
+        if self.label_index is None:
+            raise QueryError(404, "Label search is not available")
+        matches = self.label_index.fuzzy(text, lang) if fuzzy else self.label_index.lookup(text, lang)
+        return [{'unit': self.concepts.get(match.name, {'name': match.name}), 'label': match.label,
+                 'lang': match.lang, 'score': match.score} for match in matches]
+
+    def localize(self, data, lang):
+        # Copy of flat records with the prefLabel in the given language
+        labels = self.labels(lang)
+        if isinstance(data, list):
+            return [self.localize(item, lang) for item in data]
+        if isinstance(data, dict) and 'name' in data:
+            record = dict(data)
+            if 'prefLabel' in record:
+                record['prefLabel'] = labels.get(record['prefLabel'], record['prefLabel'])
+            return record
+        if isinstance(data, dict):
+            return {key: self.localize(value, lang) for key, value in data.items()}
+        return data
+
+    def info(self):
+        return {
+            'version': self.version,
+            'units': len(self.concepts),
+            'collections': {key: len(names) for key, names in self.collections.items()},
+            'ranks': sorted(self.by_rank),
+            'languages': sorted(self.translations),
+            'endpoints': ['/units/<name>', '/units/<name>/ancestors', '/units/<name>/descendants',
+                          '/notation/<code>', '/ranks/<rank>', '/at?age=', '/overlapping?young=&old=&collection=',
+                          '/labels/<lang>', '/search?q=&lang=&fuzzy='],
+        }
+
+def float_param(params, name):
+    if name not in params:
+        raise QueryError(400, f"Missing parameter {name!r}")
+    try:
+        return float(params[name])
+    except ValueError:
+        raise QueryError(400, f"Parameter {name!r} must be a number") from None
+
+def query(index, path, params):
+    # Answer a request, return the data to send as JSON
+    parts = [unquote(part) for part in path.strip('/').split('/')] if path.strip('/') else []
+    if not parts:
+        return index.info()
+
+    endpoint, args = parts[0], parts[1:]
+    if endpoint == 'units' and len(args) == 1:
+        data = index.unit(args[0])
+    elif endpoint == 'units' and len(args) == 2 and args[1] == 'ancestors':
+        data = index.ancestors(args[0])
+    elif endpoint == 'units' and len(args) == 2 and args[1] == 'descendants':
+        data = index.descendants(args[0])
+    elif endpoint == 'notation' and len(args) == 1:
+        data = index.unit_by_notation(args[0])
+    elif endpoint == 'ranks' and len(args) == 1:
+        data = index.units_of_rank(args[0])
+    elif endpoint == 'at' and not args:
+        data = index.at(float_param(params, 'age'))
+    elif endpoint == 'overlapping' and not args:
+        young, old = float_param(params, 'young'), float_param(params, 'old')
+        if young > old:
+            raise QueryError(400, "'young' must not be older than 'old'")
+        keys = COLLECTION_KEYS
+        if 'collection' in params:
+            if params['collection'] not in COLLECTION_KEYS:
+                raise QueryError(400, f"Unknown collection {params['collection']!r}")
+            keys = [params['collection']]
+        data = index.overlapping(young, old, keys)
+    elif endpoint == 'labels' and len(args) == 1:
+        return index.labels(args[0])
+    elif endpoint == 'search' and not args:
+        if 'q' not in params:
+            raise QueryError(400, "Missing parameter 'q'")
+        return index.search(params['q'], params.get('lang'), params.get('fuzzy', '0') not in ('', '0', 'false'))
+    else:
+        raise QueryError(404, f"Unknown endpoint {path!r}")
+
+    if 'lang' in params:
+        data = index.localize(data, params['lang'])
+    return data
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match holds '*' or a comma-separated list of ETags, which are
+    # compared weakly (RFC 9110): a W/ prefix is ignored
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate in (etag, '*'):
+            return True
+    return False
+
+class ChartService:
+    # The index with an LRU cache of rendered responses: request -> (status, body)
+    def __init__(self, index, cache_size=DEFAULT_CACHE_SIZE):
+        self.index = index
+        self.etag = f'"{index.version[:32]}"'
+        self.render = lru_cache(maxsize=cache_size)(self._render)
+
+    def _render(self, path, query_string):
+        try:
+            status, data = 200, query(self.index, path, dict(parse_qsl(query_string)))
+        except QueryError as e:
+            status, data = e.status, {'error': str(e)}
+        return status, json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+class ChartRequestHandler(BaseHTTPRequestHandler):
+    # self.server.service is the ChartService
+    verbose = False
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        # Parameters are sorted so that equivalent requests share a cache entry
+        query_string = '&'.join(sorted(url.query.split('&'))) if url.query else ''
+
+        status, body = service.render(url.path, query_string)
+        if status == 200 and etag_matches(self.headers.get('If-None-Match'), service.etag):
+            self.send_response(304)
+            self.send_header('ETag', service.etag)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200:
+            self.send_header('ETag', service.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+def make_server(index, host='127.0.0.1', port=8000, cache_size=DEFAULT_CACHE_SIZE, verbose=False):
+    handler = type('Handler', (ChartRequestHandler,), {'verbose': verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.service = ChartService(index, cache_size)
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve queries over the chronostratigraphic chart on a local HTTP port")
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help="number of rendered responses kept in memory")
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto')
+    parser.add_argument('--verbose', '-v', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    index = ChartIndex.from_file(args.ttl_file, use_cache=not args.no_cache, parser=args.parser)
+    server = make_server(index, args.host, args.port, args.cache_size, args.verbose)
+    print(f"Serving {len(index.concepts)} units of {args.ttl_file} on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
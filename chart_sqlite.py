@@ -0,0 +1,175 @@
+#SQLite export of the chart, for workers running many interval and label queries
+#
+#One database file holds:
+#    units        every concept once: name, rank, broader, boundaries and their errors,
+#                 order, colour, notation, ratifiedGSSP and the Euler-tour numbering
+#                 tree_left/tree_right of converter.tree_intervals
+#    collections  members of each collection (ages ... supereons, and the subperiods
+#                 between the Carboniferous and its epochs) in chart order
+#    labels       every prefLabel and altLabel with its language tag as in the TTL file
+#                 (the tags of translations/<lang>.json) and its label_index.normalize() key
+#    intervals    R*Tree over (ending, beginning) of the units with both boundaries
+#
+#Workers open it read-only and memory-mapped, so the pages are shared between processes
+#through the OS page cache and nothing is parsed:
+#    db = connect('chart.sqlite')
+#    overlapping(db, 60, 70, 'ages'), units_by_label(db, 'Maastrichtium', 'de')
+#
+#Usage: python converter.py --sqlite chart.sqlite, or python chart_sqlite.py [TTL file] [--output chart.sqlite]
+import argparse
+import os
+import sqlite3
+
+from chart_cache import load_or_build
+from converter import PARSERS, load_collections, normalize_collections, read_triples
+from extract_translations import SKOS, is_concept
+from label_index import normalize
+
+# Size of the memory map of a reader connection, larger than any chart
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+
+SCHEMA = '''
+CREATE TABLE units (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    rank TEXT,
+    broader TEXT,
+    beginning REAL,
+    ending REAL,
+    beginning_error REAL,
+    ending_error REAL,
+    "order" INTEGER,
+    color TEXT,
+    notation TEXT,
+    ratifiedGSSP INTEGER,
+    tree_left INTEGER,
+    tree_right INTEGER
+);
+CREATE TABLE collections (
+    collection TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    unit INTEGER NOT NULL REFERENCES units(id),
+    PRIMARY KEY (collection, position)
+) WITHOUT ROWID;
+CREATE TABLE labels (
+    unit INTEGER NOT NULL REFERENCES units(id),
+    lang TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    label TEXT NOT NULL,
+    key TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE intervals USING rtree(id, ending, beginning);
+'''
+
+# Created after the rows are inserted, which is faster than updating them row by row
+INDEXES = '''
+CREATE INDEX units_interval ON units (ending, beginning);
+CREATE INDEX units_broader ON units (broader);
+CREATE INDEX units_notation ON units (notation);
+CREATE INDEX collections_unit ON collections (unit);
+CREATE INDEX labels_key ON labels (key, lang);
+CREATE INDEX labels_unit ON labels (unit, lang);
+'''
+
+UNIT_COLUMNS = ['name', 'rank', 'broader', 'beginning', 'ending', 'beginning_error', 'ending_error', 'order',
+                'color', 'notation', 'ratifiedGSSP']
+
+def label_rows(triples_by_subject):
+    # (concept name, language tag, 'pref' or 'alt', label) of every label of the concepts
+    rows = []
+    for subject, props in triples_by_subject.items():
+        if not is_concept(props):
+            continue
+        name = str(subject).split('/')[-1]
+        for kind, predicate in (('pref', SKOS.prefLabel), ('alt', SKOS.altLabel)):
+            for obj in props.get(predicate, ()):
+                rows.append((name, getattr(obj, 'language', None) or '', kind, str(obj)))
+    return rows
+
+def load_label_rows(ttl_file, use_cache=True, parser='auto'):
+    build = lambda: label_rows(read_triples(ttl_file, parser))
+    return load_or_build(ttl_file, 'label_rows', build)[0] if use_cache else build()
+
+def write_sqlite(collections, labels, output_file):
+    # The database is built in a temporary file and moved into place, so readers
+    # never see a partial database
+    normalized = normalize_collections(collections)
+    concepts, tree = normalized['concepts'], normalized['tree']
+    id_of = {name: i for i, name in enumerate(concepts, 1)}
+
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    db = sqlite3.connect(tmp_file)
+    try:
+        db.executescript(SCHEMA)
+        with db:
+            db.executemany(
+                f"INSERT INTO units VALUES ({', '.join('?' * (len(UNIT_COLUMNS) + 3))})",
+                [(id_of[name], *(concept.get(column) for column in UNIT_COLUMNS), *tree.get(name, (None, None)))
+                 for name, concept in concepts.items()])
+            db.executemany("INSERT INTO collections VALUES (?, ?, ?)",
+                           [(key, position, id_of[name]) for key, names in normalized['collections'].items()
+                            for position, name in enumerate(names)])
+            label_values = [(id_of[name], lang, kind, label, normalize(label))
+                            for name, lang, kind, label in labels if name in id_of]
+            db.executemany("INSERT INTO labels VALUES (?, ?, ?, ?, ?)", label_values)
+            db.executemany("INSERT INTO intervals VALUES (?, ?, ?)",
+                           [(id_of[name], concept['ending'], concept['beginning']) for name, concept in concepts.items()
+                            if concept.get('beginning') is not None and concept.get('ending') is not None])
+            db.executescript(INDEXES)
+        db.execute("ANALYZE")
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    os.replace(tmp_file, output_file)
+    print(f"Saved {len(concepts)} units and {len(label_values)} labels to {output_file}")
+    return output_file
+
+def export(ttl_file, output_file='chart.sqlite', use_cache=True, parser='auto'):
+    collections = load_collections(ttl_file, use_cache, parser)
+    return write_sqlite(collections, load_label_rows(ttl_file, use_cache, parser), output_file)
+
+def connect(path='chart.sqlite', mmap_size=DEFAULT_MMAP_SIZE):
+    # Read-only connection; immutable=1 tells SQLite the file never changes while
+    # open (new exports replace the file), so no locks are taken
+    db = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+    db.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    db.row_factory = sqlite3.Row
+    return db
+
+def overlapping(db, young, old, collection=None):
+    # Units whose interval (ending, beginning] overlaps [young, old], oldest first. The
+    # R*Tree stores 32-bit floats rounded outwards, so its candidates are checked
+    # against the exact boundaries of the units table
+    sql = '''SELECT units.* FROM intervals JOIN units ON units.id = intervals.id
+             WHERE intervals.ending < ? AND intervals.beginning >= ? AND units.ending < ? AND units.beginning >= ?'''
+    params = [old, young, old, young]
+    if collection is not None:
+        sql += ' AND units.id IN (SELECT unit FROM collections WHERE collection = ?)'
+        params.append(collection)
+    return db.execute(sql + ' ORDER BY units.beginning DESC', params).fetchall()
+
+def units_by_label(db, text, lang=None):
+    # Units with a label whose normalized form is that of the text, optionally in one language
+    sql = 'SELECT DISTINCT units.* FROM labels JOIN units ON units.id = labels.unit WHERE labels.key = ?'
+    params = [normalize(text)]
+    if lang is not None:
+        sql += ' AND labels.lang = ?'
+        params.append(lang)
+    return db.execute(sql, params).fetchall()
+
+def descendants(db, name):
+    # Units below the unit, depth first in chart order
+    return db.execute('''SELECT units.* FROM units, units AS outer_unit WHERE outer_unit.name = ?
+                         AND units.tree_left > outer_unit.tree_left AND units.tree_left < outer_unit.tree_right
+                         ORDER BY units.tree_left''', (name,)).fetchall()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the chart with its labels to an indexed SQLite database")
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--output', default='chart.sqlite')
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto')
+    args = parser.parse_args()
+    export(args.ttl_file, args.output, use_cache=not args.no_cache, parser=args.parser)
@@ -0,0 +1,132 @@
+#Batch age-to-unit classification taking into account the uncertainty of the samples
+#and of the chart boundaries (beginning_error / ending_error, from sdo:marginOfError)
+#
+#Sample ages and boundary ages are treated as independent normal variables whose
+#standard deviations are the given uncertainties. The probability that a sample
+#falls in the unit ending < age <= beginning is then
+#    P(X <= B) - P(X <= E) = Phi((b - x) / s_b) - Phi((e - x) / s_e)
+#with s = sqrt(sigma_sample^2 + sigma_boundary^2). Each boundary uses the largest
+#error reported for it by the units that meet there, so the probabilities of
+#adjacent units telescope and sum to 1 inside the chart.
+#
+#Everything is computed on NumPy arrays, chunk by chunk, so memory is bounded by
+#chunk_size x number of boundaries whatever the number of samples.
+from collections import namedtuple
+
+import numpy as np
+
+from chart_query import AgeIndex
+
+# Number of samples processed at once
+DEFAULT_CHUNK_SIZE = 32768
+
+# Candidate units with a lower probability than this are not reported
+DEFAULT_MIN_PROBABILITY = 1e-6
+
+# Result of a classification, for one collection:
+# names / positions / probability: most likely unit of each sample ('' / -1 / 0.0
+#   for samples outside the chart)
+# candidate_samples / candidate_names / candidate_probabilities: every unit with a
+#   probability of at least min_probability, as flat parallel arrays
+Classification = namedtuple('Classification', [
+    'names', 'positions', 'probability',
+    'candidate_samples', 'candidate_names', 'candidate_probabilities',
+])
+
+try:
+    from scipy.special import ndtr as _ndtr
+except ImportError:
+    _ndtr = None
+
+def normal_cdf(z):
+    # Standard normal CDF. Without SciPy, uses the Abramowitz & Stegun 7.1.26
+    # approximation of erf (absolute error below 1.5e-7)
+    if _ndtr is not None:
+        return _ndtr(z)
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.copysign(erf, z))
+
+class UncertainRankIndex:
+    def __init__(self, rank_index):
+        # rank_index: chart_query.RankIndex of one collection
+        self.names = rank_index.names
+        errors = {}
+        for info in rank_index.units:
+            for age_key, error_key in (('beginning', 'beginning_error'), ('ending', 'ending_error')):
+                boundary = info[age_key]
+                errors[boundary] = max(errors.get(boundary, 0.0), info.get(error_key, 0.0))
+        self.boundaries = np.array(sorted(errors), dtype=np.float64)
+        self.errors = np.array([errors[b] for b in sorted(errors)], dtype=np.float64)
+        # Boundaries of each unit, as positions in self.boundaries
+        self.beginning_positions = np.searchsorted(self.boundaries, rank_index.beginnings)
+        self.ending_positions = np.searchsorted(self.boundaries, rank_index.endings)
+
+    def probabilities(self, ages, sigmas):
+        # Probability of each unit for one chunk of samples: array (samples, units)
+        if not len(self.names):
+            return np.zeros((len(ages), 0))
+        diff = self.boundaries[None, :] - ages[:, None]
+        scale = np.sqrt(sigmas[:, None] ** 2 + self.errors[None, :] ** 2)
+        # Without any uncertainty the CDF is a step at the boundary (X <= B)
+        z = np.divide(diff, scale, out=np.where(diff >= 0, np.inf, -np.inf), where=scale > 0)
+        cdf = normal_cdf(z)
+        probabilities = cdf[:, self.beginning_positions] - cdf[:, self.ending_positions]
+        return np.clip(probabilities, 0.0, 1.0, out=probabilities)
+
+    def classify(self, ages, sigmas, chunk_size=DEFAULT_CHUNK_SIZE, min_probability=DEFAULT_MIN_PROBABILITY):
+        ages = np.asarray(ages, dtype=np.float64)
+        sigmas = np.broadcast_to(np.asarray(sigmas, dtype=np.float64), ages.shape)
+        n = len(ages)
+        positions = np.full(n, -1, dtype=np.intp)
+        probability = np.zeros(n, dtype=np.float64)
+        candidate_samples, candidate_units, candidate_probabilities = [], [], []
+
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            chunk = self.probabilities(ages[start:stop], sigmas[start:stop])
+            if not chunk.shape[1]:
+                break
+            best = np.argmax(chunk, axis=1)
+            best_probability = chunk[np.arange(len(chunk)), best]
+            inside = best_probability > 0
+            positions[start:stop] = np.where(inside, best, -1)
+            probability[start:stop] = np.where(inside, best_probability, 0.0)
+
+            samples, units = np.nonzero(chunk >= max(min_probability, np.finfo(np.float64).tiny))
+            candidate_samples.append(samples + start)
+            candidate_units.append(units)
+            candidate_probabilities.append(chunk[samples, units])
+
+        # Position -1 (outside the chart) selects the trailing ''
+        names = np.array(self.names + [''], dtype=object)
+        if candidate_samples:
+            candidate_samples = np.concatenate(candidate_samples)
+            candidate_units = np.concatenate(candidate_units)
+            candidate_probabilities = np.concatenate(candidate_probabilities)
+        else:
+            candidate_samples = np.zeros(0, dtype=np.intp)
+            candidate_units = np.zeros(0, dtype=np.intp)
+            candidate_probabilities = np.zeros(0, dtype=np.float64)
+        return Classification(names[positions], positions, probability,
+                              candidate_samples, names[candidate_units], candidate_probabilities)
+
+class UncertainAgeIndex:
+    def __init__(self, age_index):
+        # age_index: chart_query.AgeIndex
+        self.ranks = {key: UncertainRankIndex(rank) for key, rank in age_index.ranks.items()}
+
+    @classmethod
+    def from_collections(cls, collections):
+        return cls(AgeIndex(collections))
+
+    def classify(self, ages, sigmas, key, chunk_size=DEFAULT_CHUNK_SIZE, min_probability=DEFAULT_MIN_PROBABILITY):
+        # Classify the sample ages (in Ma) with their 1-sigma uncertainties (an
+        # array or a single value) in the collection `key`
+        return self.ranks[key].classify(ages, sigmas, chunk_size, min_probability)
+
+    def classify_chain(self, ages, sigmas, chunk_size=DEFAULT_CHUNK_SIZE, min_probability=DEFAULT_MIN_PROBABILITY):
+        # classify() for every collection: output key -> Classification
+        return {key: rank.classify(ages, sigmas, chunk_size, min_probability) for key, rank in self.ranks.items()}
@@ -1,760 +1,615 @@
-#Script to convert ttl file from chronostratigraphic information to json
-import json
-import rdflib
-import os
-from rdflib import URIRef, Literal
-
-#read ttl file
-ttl_file = 'ChronostratChart2024-12.ttl'
-#we will extract info from the ttl file and convert it to json
-#load ttl file
-g = rdflib.Graph()
-g.parse(ttl_file, format='ttl')
-
-# Query to extract the list of ages (members of ischart:Ages collection)
-query = """
-    PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-    PREFIX ischart: <http://resource.geosciml.org/classifier/ics/ischart/>
-    
-    SELECT ?member
-    WHERE {
-        ischart:Ages skos:member ?member .
-    }
-"""
-results = g.query(query)
-
-# Extract the age URIs from the results
-age_uris = []
-for row in results:
-    age_uris.append(row.member)
-
-# Create a list to store detailed information for each age
-ages_detailed = []
-
-# Define the namespaces we'll need to query
-GTS = rdflib.Namespace("http://resource.geosciml.org/ontology/timescale/gts#")
-SKOS = rdflib.Namespace("http://www.w3.org/2004/02/skos/core#")
-RDFS = rdflib.Namespace("http://www.w3.org/2000/01/rdf-schema#")
-TIME = rdflib.Namespace("http://www.w3.org/2006/time#")
-ISCHART = rdflib.Namespace("http://resource.geosciml.org/classifier/ics/ischart/")
-PROV = rdflib.Namespace("http://www.w3.org/ns/prov#")
-SDO = rdflib.Namespace("https://schema.org/")
-SH = rdflib.Namespace("http://www.w3.org/ns/shacl#")
-RANK = rdflib.Namespace("http://resource.geosciml.org/ontology/timescale/rank/")
-TS = rdflib.Namespace("http://resource.geosciml.org/vocabulary/timescale/")
-
-# Process each age URI to extract detailed information
-for age_uri in age_uris:
-    age_info = {}
-    
-    # Extract the age name from the URI
-    age_name = str(age_uri).split('/')[-1]
-    age_info['name'] = age_name
-    
-    # Get English preferred label if available
-    for obj in g.objects(age_uri, SKOS.prefLabel):
-        if obj.language == 'en':
-            age_info['prefLabel'] = str(obj)
-            break
-    
-    # Get rank
-    for obj in g.objects(age_uri, GTS.rank):
-        rank_value = str(obj).split('/')[-1]
-        age_info['rank'] = rank_value
-        break
-    
-    # Check if ratifiedGSSP is true
-    age_info['ratifiedGSSP'] = (age_uri, GTS.ratifiedGSSP, Literal(True)) in g
-    
-    # Get isDefinedBy
-    for obj in g.objects(age_uri, RDFS.isDefinedBy):
-        defined_by = str(obj).split(':')[-1]
-        age_info['isDefinedBy'] = defined_by
-        break
-    
-    # Get definition
-    for obj in g.objects(age_uri, SKOS.definition):
-        age_info['definition'] = str(obj)
-        break
-    
-    # Get broader concept (parent)
-    for obj in g.objects(age_uri, SKOS.broader):
-        broader = str(obj).split('/')[-1]
-        age_info['broader'] = broader
-        break
-    
-    # Get notation (short code)
-    for obj in g.objects(age_uri, SKOS.notation):
-        age_info['notation'] = str(obj)
-        break
-    
-    # Get time beginning and ending
-    for beginning_node in g.objects(age_uri, TIME.hasBeginning):
-        for mya in g.objects(beginning_node, ISCHART.inMYA):
-            age_info['beginning'] = float(mya)
-        for error in g.objects(beginning_node, SDO.marginOfError):
-            age_info['beginning_error'] = float(error)
-    
-    for end_node in g.objects(age_uri, TIME.hasEnd):
-        for mya in g.objects(end_node, ISCHART.inMYA):
-            age_info['ending'] = float(mya)
-        for error in g.objects(end_node, SDO.marginOfError):
-            age_info['ending_error'] = float(error)
-    
-    # Get derivedFrom
-    for obj in g.objects(age_uri, PROV.wasDerivedFrom):
-        derived_from = str(obj).split(':')[-1]
-        age_info['derivedFrom'] = derived_from
-        break
-    
-    # Get order
-    for obj in g.objects(age_uri, SH.order):
-        age_info['order'] = int(obj)
-        break
-    
-    # Get color
-    for obj in g.objects(age_uri, SDO.color):
-        color = str(obj).replace('^^http://resource.geosciml.org/classifier/ics/ischart/RGBHex', '')
-        age_info['color'] = color
-        break
-    
-    # Add this age to our collection
-    ages_detailed.append(age_info)
-
-# Sort ages by order if available
-ages_detailed.sort(key=lambda x: x.get('order', float('inf')))
-
-# Create a dictionary to access ages by name for later use
-ages_by_name = {age_info['name']: age_info for age_info in ages_detailed}
-
-# Now extract the epochs
-epoch_query = """
-    PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-    PREFIX ischart: <http://resource.geosciml.org/classifier/ics/ischart/>
-    
-    SELECT ?member
-    WHERE {
-        ischart:Epochs skos:member ?member .
-    }
-"""
-epoch_results = g.query(epoch_query)
-
-# Extract the epoch URIs from the results
-epoch_uris = []
-for row in epoch_results:
-    epoch_uris.append(row.member)
-
-# Create a list to store detailed information for each epoch
-epochs_detailed = []
-
-# Process each epoch URI to extract detailed information
-for epoch_uri in epoch_uris:
-    epoch_info = {}
-    
-    # Extract the epoch name from the URI
-    epoch_name = str(epoch_uri).split('/')[-1]
-    epoch_info['name'] = epoch_name
-    
-    # Get English preferred label if available
-    for obj in g.objects(epoch_uri, SKOS.prefLabel):
-        if obj.language == 'en':
-            epoch_info['prefLabel'] = str(obj)
-            break
-    
-    # Get rank
-    for obj in g.objects(epoch_uri, GTS.rank):
-        rank_value = str(obj).split('/')[-1]
-        epoch_info['rank'] = rank_value
-        break
-    
-    # Check if ratifiedGSSP is true
-    epoch_info['ratifiedGSSP'] = (epoch_uri, GTS.ratifiedGSSP, Literal(True)) in g
-    
-    # Get isDefinedBy
-    for obj in g.objects(epoch_uri, RDFS.isDefinedBy):
-        defined_by = str(obj).split(':')[-1]
-        epoch_info['isDefinedBy'] = defined_by
-        break
-    
-    # Get definition
-    for obj in g.objects(epoch_uri, SKOS.definition):
-        epoch_info['definition'] = str(obj)
-        break
-    
-    # Get broader concept (parent)
-    for obj in g.objects(epoch_uri, SKOS.broader):
-        broader = str(obj).split('/')[-1]
-        epoch_info['broader'] = broader
-        break
-    
-    # Get notation (short code)
-    for obj in g.objects(epoch_uri, SKOS.notation):
-        epoch_info['notation'] = str(obj)
-        break
-    
-    # Get time beginning and ending
-    for beginning_node in g.objects(epoch_uri, TIME.hasBeginning):
-        for mya in g.objects(beginning_node, ISCHART.inMYA):
-            epoch_info['beginning'] = float(mya)
-        for error in g.objects(beginning_node, SDO.marginOfError):
-            epoch_info['beginning_error'] = float(error)
-    
-    for end_node in g.objects(epoch_uri, TIME.hasEnd):
-        for mya in g.objects(end_node, ISCHART.inMYA):
-            epoch_info['ending'] = float(mya)
-        for error in g.objects(end_node, SDO.marginOfError):
-            epoch_info['ending_error'] = float(error)
-    
-    # Get derivedFrom
-    for obj in g.objects(epoch_uri, PROV.wasDerivedFrom):
-        derived_from = str(obj).split(':')[-1]
-        epoch_info['derivedFrom'] = derived_from
-        break
-    
-    # Get order
-    for obj in g.objects(epoch_uri, SH.order):
-        epoch_info['order'] = int(obj)
-        break
-    
-    # Get color
-    for obj in g.objects(epoch_uri, SDO.color):
-        color = str(obj).replace('^^http://resource.geosciml.org/classifier/ics/ischart/RGBHex', '')
-        epoch_info['color'] = color
-        break
-    
-    # Get narrower/children concepts and add detailed child data
-    narrower_concepts = []
-    for obj in g.objects(epoch_uri, SKOS.narrower):
-        narrower_name = str(obj).split('/')[-1]
-        narrower_concepts.append(narrower_name)
-    
-    # Get the full detailed age data for each child
-    children_data = []
-    for child_name in narrower_concepts:
-        if child_name in ages_by_name:
-            children_data.append(ages_by_name[child_name])
-    
-    epoch_info['children'] = children_data
-    
-    # Add this epoch to our collection
-    epochs_detailed.append(epoch_info)
-
-# Sort epochs by order if available
-epochs_detailed.sort(key=lambda x: x.get('order', float('inf')))
-
-# Create a dictionary to access epochs by name for later use
-epochs_by_name = {epoch_info['name']: epoch_info for epoch_info in epochs_detailed}
-
-# Now extract the periods
-period_query = """
-    PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-    PREFIX ischart: <http://resource.geosciml.org/classifier/ics/ischart/>
-    
-    SELECT ?member
-    WHERE {
-        ischart:Periods skos:member ?member .
-    }
-"""
-period_results = g.query(period_query)
-
-# Extract the period URIs from the results
-period_uris = []
-for row in period_results:
-    period_uris.append(row.member)
-
-# Create a list to store detailed information for each period
-periods_detailed = []
-
-# Process each period URI to extract detailed information
-for period_uri in period_uris:
-    period_info = {}
-    
-    # Extract the period name from the URI
-    period_name = str(period_uri).split('/')[-1]
-    period_info['name'] = period_name
-    
-    # Get English preferred label if available
-    for obj in g.objects(period_uri, SKOS.prefLabel):
-        if obj.language == 'en':
-            period_info['prefLabel'] = str(obj)
-            break
-    
-    # Get rank
-    for obj in g.objects(period_uri, GTS.rank):
-        rank_value = str(obj).split('/')[-1]
-        period_info['rank'] = rank_value
-        break
-    
-    # Check if ratifiedGSSP is true
-    period_info['ratifiedGSSP'] = (period_uri, GTS.ratifiedGSSP, Literal(True)) in g
-    
-    # Get isDefinedBy
-    for obj in g.objects(period_uri, RDFS.isDefinedBy):
-        defined_by = str(obj).split(':')[-1]
-        period_info['isDefinedBy'] = defined_by
-        break
-    
-    # Get definition
-    for obj in g.objects(period_uri, SKOS.definition):
-        period_info['definition'] = str(obj)
-        break
-    
-    # Get broader concept (parent)
-    for obj in g.objects(period_uri, SKOS.broader):
-        broader = str(obj).split('/')[-1]
-        period_info['broader'] = broader
-        break
-    
-    # Get notation (short code)
-    for obj in g.objects(period_uri, SKOS.notation):
-        period_info['notation'] = str(obj)
-        break
-    
-    # Get time beginning and ending
-    for beginning_node in g.objects(period_uri, TIME.hasBeginning):
-        for mya in g.objects(beginning_node, ISCHART.inMYA):
-            period_info['beginning'] = float(mya)
-        for error in g.objects(beginning_node, SDO.marginOfError):
-            period_info['beginning_error'] = float(error)
-    
-    for end_node in g.objects(period_uri, TIME.hasEnd):
-        for mya in g.objects(end_node, ISCHART.inMYA):
-            period_info['ending'] = float(mya)
-        for error in g.objects(end_node, SDO.marginOfError):
-            period_info['ending_error'] = float(error)
-    
-    # Get derivedFrom
-    for obj in g.objects(period_uri, PROV.wasDerivedFrom):
-        derived_from = str(obj).split(':')[-1]
-        period_info['derivedFrom'] = derived_from
-        break
-    
-    # Get order
-    for obj in g.objects(period_uri, SH.order):
-        period_info['order'] = int(obj)
-        break
-    
-    # Get color
-    for obj in g.objects(period_uri, SDO.color):
-        color = str(obj).replace('^^http://resource.geosciml.org/classifier/ics/ischart/RGBHex', '')
-        period_info['color'] = color
-        break
-    
-    # Get narrower/children concepts
-    narrower_concepts = []
-    for obj in g.objects(period_uri, SKOS.narrower):
-        narrower_name = str(obj).split('/')[-1]
-        narrower_concepts.append(narrower_name)
-    
-    # Get the full detailed epoch data for each child
-    children_data = []
-    for child_name in narrower_concepts:
-        if child_name in epochs_by_name:
-            children_data.append(epochs_by_name[child_name])
-    
-    period_info['children'] = children_data
-    
-    # Add this period to our collection
-    periods_detailed.append(period_info)
-
-# Sort periods by order if available
-periods_detailed.sort(key=lambda x: x.get('order', float('inf')))
-
-# Create a dictionary to access periods by name for later use
-periods_by_name = {period_info['name']: period_info for period_info in periods_detailed}
-
-# Now extract the eras
-era_query = """
-    PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-    PREFIX ischart: <http://resource.geosciml.org/classifier/ics/ischart/>
-    
-    SELECT ?member
-    WHERE {
-        ischart:Eras skos:member ?member .
-    }
-"""
-era_results = g.query(era_query)
-
-# Extract the era URIs from the results
-era_uris = []
-for row in era_results:
-    era_uris.append(row.member)
-
-# Create a list to store detailed information for each era
-eras_detailed = []
-
-# Process each era URI to extract detailed information
-for era_uri in era_uris:
-    era_info = {}
-    
-    # Extract the era name from the URI
-    era_name = str(era_uri).split('/')[-1]
-    era_info['name'] = era_name
-    
-    # Get English preferred label if available
-    for obj in g.objects(era_uri, SKOS.prefLabel):
-        if obj.language == 'en':
-            era_info['prefLabel'] = str(obj)
-            break
-    
-    # Get rank
-    for obj in g.objects(era_uri, GTS.rank):
-        rank_value = str(obj).split('/')[-1]
-        era_info['rank'] = rank_value
-        break
-    
-    # Check if ratifiedGSSP is true
-    era_info['ratifiedGSSP'] = (era_uri, GTS.ratifiedGSSP, Literal(True)) in g
-    
-    # Get isDefinedBy
-    for obj in g.objects(era_uri, RDFS.isDefinedBy):
-        defined_by = str(obj).split(':')[-1]
-        era_info['isDefinedBy'] = defined_by
-        break
-    
-    # Get definition
-    for obj in g.objects(era_uri, SKOS.definition):
-        era_info['definition'] = str(obj)
-        break
-    
-    # Get broader concept (parent)
-    for obj in g.objects(era_uri, SKOS.broader):
-        broader = str(obj).split('/')[-1]
-        era_info['broader'] = broader
-        break
-    
-    # Get notation (short code)
-    for obj in g.objects(era_uri, SKOS.notation):
-        era_info['notation'] = str(obj)
-        break
-    
-    # Get time beginning and ending
-    for beginning_node in g.objects(era_uri, TIME.hasBeginning):
-        for mya in g.objects(beginning_node, ISCHART.inMYA):
-            era_info['beginning'] = float(mya)
-        for error in g.objects(beginning_node, SDO.marginOfError):
-            era_info['beginning_error'] = float(error)
-    
-    for end_node in g.objects(era_uri, TIME.hasEnd):
-        for mya in g.objects(end_node, ISCHART.inMYA):
-            era_info['ending'] = float(mya)
-        for error in g.objects(end_node, SDO.marginOfError):
-            era_info['ending_error'] = float(error)
-    
-    # Get derivedFrom
-    for obj in g.objects(era_uri, PROV.wasDerivedFrom):
-        derived_from = str(obj).split(':')[-1]
-        era_info['derivedFrom'] = derived_from
-        break
-    
-    # Get order
-    for obj in g.objects(era_uri, SH.order):
-        era_info['order'] = int(obj)
-        break
-    
-    # Get color
-    for obj in g.objects(era_uri, SDO.color):
-        color = str(obj).replace('^^http://resource.geosciml.org/classifier/ics/ischart/RGBHex', '')
-        era_info['color'] = color
-        break
-    
-    # Get narrower/children concepts
-    narrower_concepts = []
-    for obj in g.objects(era_uri, SKOS.narrower):
-        narrower_name = str(obj).split('/')[-1]
-        narrower_concepts.append(narrower_name)
-    
-    # Get the full detailed period data for each child
-    children_data = []
-    for child_name in narrower_concepts:
-        if child_name in periods_by_name:
-            children_data.append(periods_by_name[child_name])
-    
-    era_info['children'] = children_data
-    
-    # Add this era to our collection
-    eras_detailed.append(era_info)
-
-# Sort eras by order if available
-eras_detailed.sort(key=lambda x: x.get('order', float('inf')))
-
-# Create a dictionary to access eras by name for later use
-eras_by_name = {era_info['name']: era_info for era_info in eras_detailed}
-
-# Now extract the eons
-eon_query = """
-    PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-    PREFIX ischart: <http://resource.geosciml.org/classifier/ics/ischart/>
-    
-    SELECT ?member
-    WHERE {
-        ischart:Eons skos:member ?member .
-    }
-"""
-eon_results = g.query(eon_query)
-
-# Extract the eon URIs from the results
-eon_uris = []
-for row in eon_results:
-    eon_uris.append(row.member)
-
-# Create a list to store detailed information for each eon
-eons_detailed = []
-
-# Process each eon URI to extract detailed information
-for eon_uri in eon_uris:
-    eon_info = {}
-    
-    # Extract the eon name from the URI
-    eon_name = str(eon_uri).split('/')[-1]
-    eon_info['name'] = eon_name
-    
-    # Get English preferred label if available
-    for obj in g.objects(eon_uri, SKOS.prefLabel):
-        if obj.language == 'en':
-            eon_info['prefLabel'] = str(obj)
-            break
-    
-    # Get rank
-    for obj in g.objects(eon_uri, GTS.rank):
-        rank_value = str(obj).split('/')[-1]
-        eon_info['rank'] = rank_value
-        break
-    
-    # Check if ratifiedGSSP is true
-    eon_info['ratifiedGSSP'] = (eon_uri, GTS.ratifiedGSSP, Literal(True)) in g
-    
-    # Get isDefinedBy
-    for obj in g.objects(eon_uri, RDFS.isDefinedBy):
-        defined_by = str(obj).split(':')[-1]
-        eon_info['isDefinedBy'] = defined_by
-        break
-    
-    # Get definition
-    for obj in g.objects(eon_uri, SKOS.definition):
-        eon_info['definition'] = str(obj)
-        break
-    
-    # Get broader concept (parent)
-    for obj in g.objects(eon_uri, SKOS.broader):
-        broader = str(obj).split('/')[-1]
-        eon_info['broader'] = broader
-        break
-    
-    # Get notation (short code)
-    for obj in g.objects(eon_uri, SKOS.notation):
-        eon_info['notation'] = str(obj)
-        break
-    
-    # Get time beginning and ending
-    for beginning_node in g.objects(eon_uri, TIME.hasBeginning):
-        for mya in g.objects(beginning_node, ISCHART.inMYA):
-            eon_info['beginning'] = float(mya)
-        for error in g.objects(beginning_node, SDO.marginOfError):
-            eon_info['beginning_error'] = float(error)
-    
-    for end_node in g.objects(eon_uri, TIME.hasEnd):
-        for mya in g.objects(end_node, ISCHART.inMYA):
-            eon_info['ending'] = float(mya)
-        for error in g.objects(end_node, SDO.marginOfError):
-            eon_info['ending_error'] = float(error)
-    
-    # Get derivedFrom
-    for obj in g.objects(eon_uri, PROV.wasDerivedFrom):
-        derived_from = str(obj).split(':')[-1]
-        eon_info['derivedFrom'] = derived_from
-        break
-    
-    # Get order
-    for obj in g.objects(eon_uri, SH.order):
-        eon_info['order'] = int(obj)
-        break
-    
-    # Get color
-    for obj in g.objects(eon_uri, SDO.color):
-        color = str(obj).replace('^^http://resource.geosciml.org/classifier/ics/ischart/RGBHex', '')
-        eon_info['color'] = color
-        break
-    
-    # Get narrower/children concepts
-    narrower_concepts = []
-    for obj in g.objects(eon_uri, SKOS.narrower):
-        narrower_name = str(obj).split('/')[-1]
-        narrower_concepts.append(narrower_name)
-    
-    # Get the full detailed era data for each child
-    children_data = []
-    for child_name in narrower_concepts:
-        if child_name in eras_by_name:
-            children_data.append(eras_by_name[child_name])
-    
-    eon_info['children'] = children_data
-    
-    # Add this eon to our collection
-    eons_detailed.append(eon_info)
-
-# Sort eons by order if available
-eons_detailed.sort(key=lambda x: x.get('order', float('inf')))
-
-# Create a dictionary to access eons by name for later use
-eons_by_name = {eon_info['name']: eon_info for eon_info in eons_detailed}
-
-# Finally, extract the super-eons
-supereon_query = """
-    PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-    PREFIX ischart: <http://resource.geosciml.org/classifier/ics/ischart/>
-    
-    SELECT ?member
-    WHERE {
-        ischart:SuperEons skos:member ?member .
-    }
-"""
-supereon_results = g.query(supereon_query)
-
-# Extract the super-eon URIs from the results
-supereon_uris = []
-for row in supereon_results:
-    supereon_uris.append(row.member)
-
-# Create a list to store detailed information for each super-eon
-supereons_detailed = []
-
-# Process each super-eon URI to extract detailed information
-for supereon_uri in supereon_uris:
-    supereon_info = {}
-    
-    # Extract the super-eon name from the URI
-    supereon_name = str(supereon_uri).split('/')[-1]
-    supereon_info['name'] = supereon_name
-    
-    # Get English preferred label if available
-    for obj in g.objects(supereon_uri, SKOS.prefLabel):
-        if obj.language == 'en':
-            supereon_info['prefLabel'] = str(obj)
-            break
-    
-    # Get rank
-    for obj in g.objects(supereon_uri, GTS.rank):
-        rank_value = str(obj).split('/')[-1]
-        supereon_info['rank'] = rank_value
-        break
-    
-    # Check if ratifiedGSSP is true
-    supereon_info['ratifiedGSSP'] = (supereon_uri, GTS.ratifiedGSSP, Literal(True)) in g
-    
-    # Get isDefinedBy
-    for obj in g.objects(supereon_uri, RDFS.isDefinedBy):
-        defined_by = str(obj).split(':')[-1]
-        supereon_info['isDefinedBy'] = defined_by
-        break
-    
-    # Get definition
-    for obj in g.objects(supereon_uri, SKOS.definition):
-        supereon_info['definition'] = str(obj)
-        break
-    
-    # Get notation (short code)
-    for obj in g.objects(supereon_uri, SKOS.notation):
-        supereon_info['notation'] = str(obj)
-        break
-    
-    # Get time beginning and ending
-    for beginning_node in g.objects(supereon_uri, TIME.hasBeginning):
-        for mya in g.objects(beginning_node, ISCHART.inMYA):
-            supereon_info['beginning'] = float(mya)
-        for error in g.objects(beginning_node, SDO.marginOfError):
-            supereon_info['beginning_error'] = float(error)
-    
-    for end_node in g.objects(supereon_uri, TIME.hasEnd):
-        for mya in g.objects(end_node, ISCHART.inMYA):
-            supereon_info['ending'] = float(mya)
-        for error in g.objects(end_node, SDO.marginOfError):
-            supereon_info['ending_error'] = float(error)
-    
-    # Get derivedFrom
-    for obj in g.objects(supereon_uri, PROV.wasDerivedFrom):
-        derived_from = str(obj).split(':')[-1]
-        supereon_info['derivedFrom'] = derived_from
-        break
-    
-    # Get order
-    for obj in g.objects(supereon_uri, SH.order):
-        supereon_info['order'] = int(obj)
-        break
-    
-    # Get color
-    for obj in g.objects(supereon_uri, SDO.color):
-        color = str(obj).replace('^^http://resource.geosciml.org/classifier/ics/ischart/RGBHex', '')
-        supereon_info['color'] = color
-        break
-    
-    # Get narrower/children concepts
-    narrower_concepts = []
-    for obj in g.objects(supereon_uri, SKOS.narrower):
-        narrower_name = str(obj).split('/')[-1]
-        narrower_concepts.append(narrower_name)
-    
-    # Get the full detailed eon data for each child
-    children_data = []
-    for child_name in narrower_concepts:
-        if child_name in eons_by_name:
-            children_data.append(eons_by_name[child_name])
-    
-    supereon_info['children'] = children_data
-    
-    # Add this super-eon to our collection
-    supereons_detailed.append(supereon_info)
-
-# Sort super-eons by order if available
-supereons_detailed.sort(key=lambda x: x.get('order', float('inf')))
-
-# Convert all data to JSON
-ages_json = json.dumps(ages_detailed, indent=2)
-epochs_json = json.dumps(epochs_detailed, indent=2)
-periods_json = json.dumps(periods_detailed, indent=2)
-eras_json = json.dumps(eras_detailed, indent=2)
-eons_json = json.dumps(eons_detailed, indent=2)
-supereons_json = json.dumps(supereons_detailed, indent=2)
-
-# Print previews
-print(f"\nFound {len(ages_detailed)} ages with detailed information")
-print(f"Found {len(epochs_detailed)} epochs with detailed information")
-print(f"Found {len(periods_detailed)} periods with detailed information")
-print(f"Found {len(eras_detailed)} eras with detailed information")
-print(f"Found {len(eons_detailed)} eons with detailed information")
-print(f"Found {len(supereons_detailed)} super-eons with detailed information")
-
-# Save to JSON files
-with open('ages_detailed.json', 'w') as f:
-    f.write(ages_json)
-print("\nSaved detailed ages information to ages_detailed.json")
-
-with open('epochs_detailed.json', 'w') as f:
-    f.write(epochs_json)
-print("Saved detailed epochs information to epochs_detailed.json")
-
-with open('periods_detailed.json', 'w') as f:
-    f.write(periods_json)
-print("Saved detailed periods information to periods_detailed.json")
-
-with open('eras_detailed.json', 'w') as f:
-    f.write(eras_json)
-print("Saved detailed eras information to eras_detailed.json")
-
-with open('eons_detailed.json', 'w') as f:
-    f.write(eons_json)
-print("Saved detailed eons information to eons_detailed.json")
-
-with open('supereons_detailed.json', 'w') as f:
-    f.write(supereons_json)
-print("Saved detailed super-eons information to supereons_detailed.json")
-
-# Create a complete hierarchical structure starting from super-eons
-complete_hierarchy = supereons_detailed
-
-# Save the complete hierarchical structure
-complete_json = json.dumps(complete_hierarchy, indent=2)
-with open('complete_hierarchy.json', 'w') as f:
-    f.write(complete_json)
-print("Saved complete hierarchical structure to complete_hierarchy.json")
-
+#Script to convert ttl file from chronostratigraphic information to json
+import argparse
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+from chart_cache import file_sha256, load_or_build
+from json_writer import COMPRESSIONS, DEFAULT_FORMAT, add_arguments, format_from_args, write_json
+from profiling import CountingTable, NullProfiler, Profiler
+from ttl_reader import XSD, Namespace, TurtleSubsetError, read_ttl
+
+# Define the namespaces we'll need to query. These are plain strings, the triples
+# are grouped by the string form of their subject and predicate so that records can
+# be built in the same way from rdflib and from the streaming reader
+GTS = Namespace("http://resource.geosciml.org/ontology/timescale/gts#")
+SKOS = Namespace("http://www.w3.org/2004/02/skos/core#")
+RDFS = Namespace("http://www.w3.org/2000/01/rdf-schema#")
+TIME = Namespace("http://www.w3.org/2006/time#")
+ISCHART = Namespace("http://resource.geosciml.org/classifier/ics/ischart/")
+PROV = Namespace("http://www.w3.org/ns/prov#")
+SDO = Namespace("https://schema.org/")
+SH = Namespace("http://www.w3.org/ns/shacl#")
+RANK = Namespace("http://resource.geosciml.org/ontology/timescale/rank/")
+TS = Namespace("http://resource.geosciml.org/vocabulary/timescale/")
+
+# Collections of the chart from the smallest rank to the largest:
+# (collection in the TTL file, key used for the output file, name used in messages).
+# The children of each collection are taken from the collection just before it.
+COLLECTIONS = [
+    ('Ages', 'ages', 'ages'),
+    ('Epochs', 'epochs', 'epochs'),
+    ('Periods', 'periods', 'periods'),
+    ('Eras', 'eras', 'eras'),
+    ('Eons', 'eons', 'eons'),
+    ('SuperEons', 'supereons', 'super-eons'),
+]
+
+# Collections that are part of the hierarchy but have no output file of their own:
+# (collection in the TTL file, key, name used in messages, key of the collection
+# their children are taken from). The sub-periods sit between the Carboniferous and
+# its epochs, which name them as broader
+SUBCOLLECTIONS = [
+    ('SubPeriod', 'subperiods', 'sub-periods', 'epochs'),
+]
+
+# Keys of all the collections from the top of the hierarchy down
+HIERARCHY_KEYS = ['supereons', 'eons', 'eras', 'periods', 'subperiods', 'epochs', 'ages']
+
+# Files used by the incremental mode: hashes and records of the previous run, and
+# the changes found in the last run
+MANIFEST_FILE = 'conversion_manifest.json'
+CHANGELOG_FILE = 'changelog.json'
+MANIFEST_VERSION = 1
+
+# Kind of change reported in the changelog for each field
+FIELD_KINDS = {
+    'beginning': 'boundary',
+    'ending': 'boundary',
+    'beginning_error': 'boundary',
+    'ending_error': 'boundary',
+    'color': 'colour',
+    'prefLabel': 'label',
+    'notation': 'label',
+}
+
+# Parsers that can be selected with --parser. 'auto' uses the streaming reader and
+# falls back to rdflib when the file uses Turtle syntax the reader doesn't support
+PARSERS = ('auto', 'stream', 'rdflib')
+
+def load_graph(ttl_file):
+    # rdflib is only imported when it is actually used
+    import rdflib
+
+    class GroupingGraph(rdflib.Graph):
+        # Groups the triples by subject and predicate while the parser adds them,
+        # in one pass in the order of the TTL file, as the streaming reader does.
+        # Iterating over the graph afterwards would lose that order: rdflib keeps
+        # the triples of a graph in a set
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.grouped = {}
+            self.added = 0
+
+        def add(self, triple):
+            s, p, o = triple
+            props = self.grouped.get(s)
+            if props is None:
+                props = self.grouped[s] = {}
+            objects = props.get(p)
+            if objects is None:
+                props[p] = [o]
+            else:
+                objects.append(o)
+            self.added += 1
+            return super().add(triple)
+
+        def group(self):
+            # The table keyed by strings, as read_ttl() returns it. Triples given
+            # twice in the file are stored once by rdflib, and here too
+            duplicates = self.added != len(self)
+            triples_by_subject = defaultdict(lambda: defaultdict(list))
+            for s, props in self.grouped.items():
+                row = triples_by_subject[str(s)]
+                for p, objects in props.items():
+                    row[str(p)] = list(dict.fromkeys(objects)) if duplicates else objects
+            return triples_by_subject
+
+    #load ttl file
+    g = GroupingGraph()
+    g.parse(ttl_file, format='ttl')
+    g.triples_by_subject = g.group()
+    del g.grouped
+    return g
+
+def group_triples(g):
+    # Triples grouped by subject and predicate, so that building a concept record
+    # only needs dictionary lookups. Graphs loaded with load_graph() were grouped
+    # while parsing
+    if hasattr(g, 'triples_by_subject'):
+        return g.triples_by_subject
+
+    # Other graphs are read through the subject index, which keeps the objects
+    # (e.g. the narrower concepts) in the order of the TTL file. Typed subjects
+    # are visited first through the type index, which keeps the concepts in file
+    # order as well
+    from rdflib.namespace import RDF
+
+    subjects = dict.fromkeys(g.subjects(RDF.type, None))
+    subjects.update(dict.fromkeys(g.subjects(unique=True)))
+    triples_by_subject = defaultdict(lambda: defaultdict(list))
+    for s in subjects:
+        props = triples_by_subject[str(s)]
+        for p, o in g.predicate_objects(s):
+            props[str(p)].append(o)
+    return triples_by_subject
+
+def is_true(obj):
+    # True for the xsd:boolean literal true, from either parser
+    return str(obj) == 'true' and str(getattr(obj, 'datatype', None)) == XSD + 'boolean'
+
+def build_concept(uri, props, triples_by_subject):
+    info = {}
+
+    # Extract the concept name from the URI
+    info['name'] = str(uri).split('/')[-1]
+
+    # Get English preferred label if available
+    for obj in props.get(SKOS.prefLabel, ()):
+        if obj.language == 'en':
+            info['prefLabel'] = str(obj)
+            break
+
+    # Get rank
+    for obj in props.get(GTS.rank, ()):
+        info['rank'] = str(obj).split('/')[-1]
+        break
+
+    # Check if ratifiedGSSP is true
+    info['ratifiedGSSP'] = any(is_true(obj) for obj in props.get(GTS.ratifiedGSSP, ()))
+
+    # Get isDefinedBy
+    for obj in props.get(RDFS.isDefinedBy, ()):
+        info['isDefinedBy'] = str(obj).split(':')[-1]
+        break
+
+    # Get definition
+    for obj in props.get(SKOS.definition, ()):
+        info['definition'] = str(obj)
+        break
+
+    # Get broader concept (parent)
+    for obj in props.get(SKOS.broader, ()):
+        info['broader'] = str(obj).split('/')[-1]
+        break
+
+    # Get notation (short code)
+    for obj in props.get(SKOS.notation, ()):
+        info['notation'] = str(obj)
+        break
+
+    # Get time beginning and ending from their blank nodes
+    for beginning_node in props.get(TIME.hasBeginning, ()):
+        node = triples_by_subject.get(str(beginning_node), {})
+        for mya in node.get(ISCHART.inMYA, ()):
+            info['beginning'] = float(mya)
+        for error in node.get(SDO.marginOfError, ()):
+            info['beginning_error'] = float(error)
+
+    for end_node in props.get(TIME.hasEnd, ()):
+        node = triples_by_subject.get(str(end_node), {})
+        for mya in node.get(ISCHART.inMYA, ()):
+            info['ending'] = float(mya)
+        for error in node.get(SDO.marginOfError, ()):
+            info['ending_error'] = float(error)
+
+    # Get derivedFrom
+    for obj in props.get(PROV.wasDerivedFrom, ()):
+        info['derivedFrom'] = str(obj).split(':')[-1]
+        break
+
+    # Get order
+    for obj in props.get(SH.order, ()):
+        info['order'] = int(obj)
+        break
+
+    # Get color
+    for obj in props.get(SDO.color, ()):
+        color = str(obj).replace('^^http://resource.geosciml.org/classifier/ics/ischart/RGBHex', '')
+        info['color'] = color
+        break
+
+    return info
+
+def collection_records(triples_by_subject, collection, children_by_name, records_by_uri=None):
+    # Records of the members of a collection, each linked to the full records of
+    # its children found in children_by_name (None for the ages), sorted by order
+    members = triples_by_subject.get(ISCHART[collection], {}).get(SKOS.member, ())
+
+    records = []
+    for uri in members:
+        props = triples_by_subject.get(str(uri), {})
+        if records_by_uri is not None and str(uri) in records_by_uri:
+            info = dict(records_by_uri[str(uri)])
+        else:
+            info = build_concept(uri, props, triples_by_subject)
+
+        # Get the full detailed data of each narrower/children concept
+        if children_by_name is not None:
+            children_data = []
+            for obj in props.get(SKOS.narrower, ()):
+                child_name = str(obj).split('/')[-1]
+                if child_name in children_by_name:
+                    children_data.append(children_by_name[child_name])
+            info['children'] = children_data
+
+        records.append(info)
+    return records
+
+def extract_collections(triples_by_subject, records_by_uri=None, profiler=None):
+    # Build the records of every collection, linking each one to the full
+    # records of its children in the collection of the rank below.
+    # records_by_uri may hold records already built with build_concept()
+    profiler = profiler or NullProfiler()
+    collections = {}
+    children_by_name = None
+    for collection, key, _ in COLLECTIONS:
+        with profiler.phase(f'extract {key}'):
+            records = collection_records(triples_by_subject, collection, children_by_name, records_by_uri)
+
+        # Sort by order if available
+        with profiler.phase(f'sort {key}'):
+            records.sort(key=lambda x: x.get('order', float('inf')))
+
+        profiler.count(f'concepts {key}', len(records))
+        collections[key] = records
+        children_by_name = {info['name']: info for info in records}
+
+    # Not written to the output files, they only complete the hierarchy
+    for collection, key, _, children_key in SUBCOLLECTIONS:
+        with profiler.phase(f'extract {key}'):
+            children_by_name = {info['name']: info for info in collections[children_key]}
+            records = collection_records(triples_by_subject, collection, children_by_name, records_by_uri)
+            records.sort(key=lambda x: x.get('order', float('inf')))
+        profiler.count(f'concepts {key}', len(records))
+        collections[key] = records
+
+    return collections
+
+def write_outputs(collections, output_dir='', json_format=DEFAULT_FORMAT, profiler=None):
+    profiler = profiler or NullProfiler()
+
+    # Print previews
+    for index, (_, key, label) in enumerate(COLLECTIONS):
+        prefix = "\n" if index == 0 else ""
+        print(f"{prefix}Found {len(collections[key])} {label} with detailed information")
+
+    # Save to JSON files
+    for index, (_, key, label) in enumerate(COLLECTIONS):
+        output_file = os.path.join(output_dir, f'{key}_detailed.json')
+        with profiler.phase(f'write {key}_detailed.json'):
+            write_json(collections[key], output_file, json_format)
+        prefix = "\n" if index == 0 else ""
+        print(f"{prefix}Saved detailed {label} information to {output_file}")
+
+    # Create a complete hierarchical structure starting from super-eons
+    complete_hierarchy = collections['supereons']
+
+    # Save the complete hierarchical structure
+    output_file = os.path.join(output_dir, 'complete_hierarchy.json')
+    with profiler.phase('write complete_hierarchy.json'):
+        write_json(complete_hierarchy, output_file, json_format)
+    print(f"Saved complete hierarchical structure to {output_file}")
+
+def normalize_collections(collections):
+    # Flat table of concepts keyed by name, where the children are stored as a
+    # list of names instead of the full nested records. A concept that is a
+    # member of several collections (e.g. Pridoli) is stored only once, with the
+    # children it has in the highest of them. The children are those of the
+    # nested records; the full hierarchy, through the sub-periods, is in 'tree'
+    output_keys = [key for _, key, _ in COLLECTIONS]
+    keys = output_keys + [key for _, key, _, _ in SUBCOLLECTIONS if key in collections]
+    concepts = {}
+    for key in keys:
+        for info in collections[key]:
+            if key not in output_keys and info['name'] in concepts:
+                continue
+            concept = {k: v for k, v in info.items() if k != 'children'}
+            concept['children'] = [child['name'] for child in info.get('children', ())]
+            concepts[info['name']] = concept
+
+    collection_names = {key: [info['name'] for info in collections[key]] for key in keys}
+    return {
+        # Names of the members of each collection, sorted by order
+        'collections': collection_names,
+        'concepts': concepts,
+        'tree': tree_intervals(concepts, collection_names),
+    }
+
+def hierarchy_children(concepts):
+    # Name -> names of the concepts directly below it, in chart order. A concept is
+    # below its broader concept when that one is in the table, otherwise below the
+    # concepts listing it as a child; this reaches the epochs of the Carboniferous
+    # through the sub-periods, which the nested records leave out
+    parent_of = {}
+    for name, concept in concepts.items():
+        broader = concept.get('broader')
+        if broader in concepts and broader != name:
+            parent_of[name] = broader
+    for name, concept in concepts.items():
+        for child in concept['children']:
+            if child in concepts and child not in parent_of and child != name:
+                parent_of[child] = name
+
+    children = {name: [] for name in concepts}
+    for name, parent in parent_of.items():
+        children[parent].append(name)
+    for names in children.values():
+        names.sort(key=lambda name: (concepts[name].get('order', float('inf')), name))
+    return children
+
+def tree_intervals(concepts, collection_names):
+    # Euler-tour numbering of the concept tree given by hierarchy_children():
+    # name -> [left, right], in preorder. A concept is inside another one when
+    # outer_left < left < outer_right, and the descendants of a concept are the
+    # concepts from left + 1 to right - 1 in this order. The roots are the
+    # concepts without a parent, from the highest collection down
+    children = hierarchy_children(concepts)
+    child_names = {child for names in children.values() for child in names}
+    roots = {}
+    for key in HIERARCHY_KEYS:
+        for name in collection_names.get(key, ()):
+            if name not in child_names:
+                roots[name] = None
+    # Concepts of no known collection
+    roots.update((name, None) for name in concepts if name not in child_names)
+
+    intervals = {}
+    def number(name):
+        # Guards against cycles in broken files
+        if name in intervals:
+            return
+        interval = intervals[name] = [len(intervals), None]
+        for child in children[name]:
+            number(child)
+        interval[1] = len(intervals)
+
+    for root in roots:
+        number(root)
+    return intervals
+
+def write_normalized(collections, output_dir='', json_format=DEFAULT_FORMAT):
+    normalized = normalize_collections(collections)
+    output_file = os.path.join(output_dir, 'chart_normalized.json')
+    write_json(normalized, output_file, json_format)
+    print(f"\nSaved {len(normalized['concepts'])} concepts in normalized form to {output_file}")
+
+def output_documents(collections, normalized=False):
+    # Files written by the converter and their content, as (file name, data)
+    if normalized:
+        return [('chart_normalized.json', normalize_collections(collections))]
+    documents = [(f'{key}_detailed.json', collections[key]) for _, key, _ in COLLECTIONS]
+    documents.append(('complete_hierarchy.json', collections['supereons']))
+    return documents
+
+def document_names(data):
+    # Names of all the concepts whose records appear in a document
+    names = set()
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if 'name' in item:
+                names.add(item['name'])
+            stack.extend(v for v in item.values() if isinstance(v, (dict, list)))
+        elif isinstance(item, list):
+            stack.extend(item)
+    return names
+
+def concept_hash(concept):
+    return hashlib.sha256(json.dumps(concept, sort_keys=True).encode('utf-8')).hexdigest()
+
+def diff_concepts(old_concepts, new_concepts):
+    # Machine-readable list of the changes between two flat concept tables
+    changes = []
+    for name in sorted(new_concepts.keys() - old_concepts.keys()):
+        changes.append({'name': name, 'change': 'added'})
+    for name in sorted(old_concepts.keys() - new_concepts.keys()):
+        changes.append({'name': name, 'change': 'removed'})
+    for name in sorted(new_concepts.keys() & old_concepts.keys()):
+        old, new = old_concepts[name], new_concepts[name]
+        for field in sorted(old.keys() | new.keys()):
+            if old.get(field) != new.get(field):
+                changes.append({
+                    'name': name,
+                    'change': 'modified',
+                    'kind': FIELD_KINDS.get(field, 'other'),
+                    'field': field,
+                    'old': old.get(field),
+                    'new': new.get(field),
+                })
+    return changes
+
+def write_incremental(collections, ttl_file, normalized=False, output_dir='', json_format=DEFAULT_FORMAT):
+    # Compare the concepts with the manifest of the previous run and only rewrite
+    # the files that contain a changed, added or removed concept
+    manifest_file = os.path.join(output_dir, MANIFEST_FILE)
+    changelog_file = os.path.join(output_dir, CHANGELOG_FILE)
+    previous = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous.get('version') != MANIFEST_VERSION:
+            previous = {}
+
+    concepts = normalize_collections(collections)['concepts']
+    hashes = {name: concept_hash(concept) for name, concept in concepts.items()}
+    old_hashes = previous.get('hashes', {})
+    changed = {name for name in hashes.keys() | old_hashes.keys() if hashes.get(name) != old_hashes.get(name)}
+    changes = diff_concepts(previous.get('concepts', {}), concepts)
+
+    # Every file is rewritten when it was written minified or compressed differently
+    output_format = {'minify': json_format.minify, 'compress': list(json_format.compress)}
+    same_format = previous.get('format') == output_format
+
+    files = {}
+    rewritten = []
+    for output_file, data in output_documents(collections, normalized):
+        names = document_names(data)
+        files[output_file] = sorted(names)
+        old_names = set(previous.get('files', {}).get(output_file, ()))
+        output_path = os.path.join(output_dir, output_file)
+        paths = [output_path] + [f"{output_path}.{suffix}" for suffix in json_format.compress]
+        if (same_format and all(os.path.exists(path) for path in paths) and output_file in previous.get('files', {})
+                and not (changed & (names | old_names))):
+            continue
+        write_json(data, output_path, json_format)
+        # Compressed siblings of a previous format would be stale
+        for suffix in COMPRESSIONS:
+            if suffix not in json_format.compress and os.path.exists(f"{output_path}.{suffix}"):
+                os.remove(f"{output_path}.{suffix}")
+        rewritten.append(output_file)
+
+    print(f"\nIncremental conversion of {ttl_file}: {len(changed)} concepts changed, {len(rewritten)} files rewritten")
+    for output_file in rewritten:
+        print(f"Saved {os.path.join(output_dir, output_file)}")
+
+    changelog = {
+        'source': ttl_file,
+        'source_sha256': file_sha256(ttl_file),
+        'previous_source': previous.get('source'),
+        'previous_source_sha256': previous.get('source_sha256'),
+        'rewritten_files': rewritten,
+        'changes': changes,
+    }
+    with open(changelog_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(changelog, indent=2, ensure_ascii=False))
+    print(f"Saved {len(changes)} changes to {changelog_file}")
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'source': ttl_file,
+        'source_sha256': changelog['source_sha256'],
+        'format': output_format,
+        'hashes': hashes,
+        'files': files,
+        'concepts': concepts,
+    }
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, indent=2, ensure_ascii=False))
+    return changelog
+
+def read_triples(ttl_file, parser='auto', profiler=None):
+    # Return the triples of the file grouped by subject and predicate
+    profiler = profiler or NullProfiler()
+    if parser in ('auto', 'stream'):
+        try:
+            with profiler.phase('parse (streaming reader)'):
+                triples_by_subject, _ = read_ttl(ttl_file)
+            return triples_by_subject
+        except TurtleSubsetError as e:
+            if parser == 'stream':
+                raise
+            print(f"Streaming reader can't read {ttl_file} ({e}), using rdflib")
+    with profiler.phase('parse (rdflib)'):
+        g = load_graph(ttl_file)
+    profiler.count('rdflib triples', len(g))
+    with profiler.phase('group triples'):
+        return group_triples(g)
+
+def count_triples(triples_by_subject):
+    return sum(len(objects) for props in triples_by_subject.values() for objects in props.values())
+
+def extract_from_file(ttl_file, parser='auto', profiler=None):
+    triples_by_subject = read_triples(ttl_file, parser, profiler)
+    if isinstance(profiler, Profiler):
+        # Count the lookups done while building the records
+        profiler.count('triples', count_triples(triples_by_subject))
+        profiler.count('subjects', len(triples_by_subject))
+        triples_by_subject = CountingTable(triples_by_subject, profiler.counters)
+    return extract_collections(triples_by_subject, profiler=profiler)
+
+def load_collections(ttl_file, use_cache=True, parser='auto', profiler=None):
+    # Unchanged TTL files are not parsed again, the extracted records are
+    # loaded from the cache instead
+    profiler = profiler or NullProfiler()
+    if use_cache:
+        with profiler.phase('load or build'):
+            collections, cached = load_or_build(ttl_file, 'collections', lambda: extract_from_file(ttl_file, parser, profiler))
+        profiler.info['cached'] = cached
+        if cached:
+            print(f"Loaded cached records for {ttl_file}")
+        return collections
+    return extract_from_file(ttl_file, parser, profiler)
+
+def convert(ttl_file, use_cache=True, parser='auto', normalized=False, incremental=False, output_dir='',
+            json_format=DEFAULT_FORMAT, profiler=None, sqlite_file=None):
+    profiler = profiler or NullProfiler()
+    profiler.info.update({'ttl_file': ttl_file, 'parser': parser, 'normalized': normalized, 'incremental': incremental})
+    collections = load_collections(ttl_file, use_cache, parser, profiler)
+    write_collections(collections, ttl_file, normalized, incremental, output_dir, json_format, profiler)
+    if sqlite_file:
+        # Imported here, chart_sqlite imports this module
+        from chart_sqlite import load_label_rows, write_sqlite
+        with profiler.phase('write sqlite'):
+            write_sqlite(collections, load_label_rows(ttl_file, use_cache, parser), sqlite_file)
+    return collections
+
+def write_collections(collections, ttl_file, normalized=False, incremental=False, output_dir='',
+                      json_format=DEFAULT_FORMAT, profiler=None):
+    # Write the outputs in the selected mode
+    profiler = profiler or NullProfiler()
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with profiler.phase('write'):
+        if incremental:
+            write_incremental(collections, ttl_file, normalized, output_dir, json_format)
+        elif normalized:
+            write_normalized(collections, output_dir, json_format)
+        else:
+            write_outputs(collections, output_dir, json_format, profiler)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the chronostratigraphic chart TTL file to JSON")
+    #read ttl file
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto',
+                        help="TTL parser: the streaming reader, rdflib, or the streaming reader with rdflib as fallback (default)")
+    parser.add_argument('--normalized', action='store_true',
+                        help="write a single flat chart_normalized.json (see chart_loader.py) instead of the nested files")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"only rewrite the files whose concepts changed since the previous run (see {MANIFEST_FILE}) and write {CHANGELOG_FILE}")
+    parser.add_argument('--output-dir', default='', help="directory for the output files (default: current directory)")
+    add_arguments(parser)
+    parser.add_argument('--sqlite', metavar='DATABASE',
+                        help="also write the units and their labels to an indexed SQLite database (see chart_sqlite.py)")
+    parser.add_argument('--schema', nargs='?', const='chart_records.schema.json', metavar='SCHEMA',
+                        help="also write the JSON Schema of the records to the output directory "
+                             "(default: chart_records.schema.json, see chart_schema.py)")
+    parser.add_argument('--profile', nargs='?', const='conversion_profile.json', metavar='REPORT',
+                        help="record the time and memory of every phase and the lookup counts, "
+                             "and write them as JSON (default: conversion_profile.json)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="with --profile, also trace the Python memory of every phase (slower)")
+    parser.add_argument('--cprofile', metavar='PSTATS', help="write a cProfile dump of the run (see pstats)")
+    parser.add_argument('--trace', metavar='TRACE', help="write the phases as a Chrome trace (chrome://tracing)")
+    args = parser.parse_args()
+    json_format = format_from_args(parser, args)
+
+    profiler = Profiler(args.profile_memory) if (args.profile or args.trace) else None
+    function_profiler = None
+    if args.cprofile:
+        import cProfile
+        function_profiler = cProfile.Profile()
+        function_profiler.enable()
+    convert(args.ttl_file, use_cache=not args.no_cache, parser=args.parser, normalized=args.normalized,
+            incremental=args.incremental, output_dir=args.output_dir, json_format=json_format, profiler=profiler,
+            sqlite_file=args.sqlite)
+    if args.schema:
+        # Imported here, chart_schema imports this module
+        from chart_schema import write_schema
+        print(f"Saved the schema of the records to {write_schema(os.path.join(args.output_dir, args.schema))}")
+    if function_profiler is not None:
+        function_profiler.disable()
+        function_profiler.dump_stats(args.cprofile)
+        print(f"Saved cProfile statistics to {args.cprofile}")
+    if profiler is not None:
+        profiler.print_summary()
+        if args.profile:
+            profiler.write_report(args.profile)
+            print(f"Saved profile report to {args.profile}")
+        if args.trace:
+            profiler.write_trace(args.trace)
+            print(f"Saved Chrome trace to {args.trace}")
@@ -1,81 +1,212 @@
-import rdflib
-import json
-import os
-from collections import defaultdict
-
-# Define the namespaces we'll need to query
-SKOS = rdflib.Namespace("http://www.w3.org/2004/02/skos/core#")
-ISCHART = rdflib.Namespace("http://resource.geosciml.org/classifier/ics/ischart/")
-
-def extract_translations():
-    # Read and parse the TTL file
-    ttl_file = 'ChronostratChart2024-12.ttl'
-    g = rdflib.Graph()
-    g.parse(ttl_file, format='ttl')
-    
-    print(f"Loaded {len(g)} triples from {ttl_file}")
-    
-    # Dictionary to store translations by language
-    translations_by_language = defaultdict(dict)
-    
-    # Find all geological time periods (any subject with a prefLabel and/or altLabel)
-    query = """
-        PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-        
-        SELECT DISTINCT ?subject
-        WHERE {
-            ?subject a skos:Concept .
-            {?subject skos:prefLabel ?label} UNION {?subject skos:altLabel ?label}
-        }
-    """
-    
-    subjects = list(g.query(query))
-    print(f"Found {len(subjects)} geological time periods")
-    
-    # Process each time period
-    count = 0
-    for subject in subjects:
-        subject_uri = subject[0]
-        
-        # Get the name/identifier of this time period (last part of the URI)
-        name = str(subject_uri).split('/')[-1]
-        
-        # Get the English label (prefLabel with @en language tag)
-        english_label = None
-        for obj in g.objects(subject_uri, SKOS.prefLabel):
-            if getattr(obj, 'language', '') == 'en':
-                english_label = str(obj)
-                break
-        
-        # Skip if no English label found
-        if not english_label:
-            continue
-            
-        count += 1
-        
-        # Get translations (altLabel with various language tags)
-        for obj in g.objects(subject_uri, SKOS.altLabel):
-            lang = getattr(obj, 'language', '')
-            if lang and lang != 'en':  # Skip if no language tag or if it's English
-                translations_by_language[lang][english_label] = str(obj)
-        
-        # Also add the English label to the English translations
-        translations_by_language['en'][english_label] = english_label
-    
-    print(f"Processed {count} time periods with English labels")
-    
-    # Create a directory for translations if it doesn't exist
-    translations_dir = 'translations'
-    if not os.path.exists(translations_dir):
-        os.makedirs(translations_dir)
-    
-    # Save translations to JSON files, one for each language
-    for lang, translations in translations_by_language.items():
-        output_file = os.path.join(translations_dir, f"{lang}.json")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(translations, f, ensure_ascii=False, indent=2)
-        print(f"Created translation file for {lang} language with {len(translations)} entries: {output_file}")
-
-if __name__ == "__main__":
-    extract_translations()
-    print("\nTranslation extraction completed!")
+import argparse
+import os
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+from chart_cache import load_or_build
+from converter import PARSERS, count_triples, group_triples, read_triples
+from json_writer import DEFAULT_FORMAT, add_arguments, format_from_args, write_json
+from ttl_reader import RDF_TYPE, Namespace
+
+# Languages written by one task of the parallel export
+DEFAULT_LANGUAGES_PER_TASK = 8
+
+# Define the namespaces we'll need to query
+SKOS = Namespace("http://www.w3.org/2004/02/skos/core#")
+ISCHART = Namespace("http://resource.geosciml.org/classifier/ics/ischart/")
+
+def labelled_concepts(triples_by_subject):
+    # Concepts with a prefLabel and/or altLabel, in the order of the TTL file
+    return [subject for subject, props in triples_by_subject.items()
+            if is_concept(props) and (SKOS.prefLabel in props or SKOS.altLabel in props)]
+
+def is_concept(props):
+    # Objects are compared as strings, they are rdflib terms or plain strings
+    return any(str(obj) == SKOS.Concept for obj in props.get(RDF_TYPE, ()))
+
+def english_label(props):
+    # The English label (prefLabel with @en language tag), or None
+    for obj in props.get(SKOS.prefLabel, ()):
+        if getattr(obj, 'language', '') == 'en':
+            return str(obj)
+    return None
+
+def add_translations(translations_by_language, props, label):
+    # Get translations (altLabel with various language tags)
+    for obj in props.get(SKOS.altLabel, ()):
+        lang = getattr(obj, 'language', '')
+        if lang and lang != 'en':  # Skip if no language tag or if it's English
+            translations_by_language[lang][label] = str(obj)
+    
+    # Also add the English label to the English translations
+    translations_by_language['en'][label] = label
+
+def collect_translations(ttl_file, parser='auto'):
+    # Read and parse the TTL file
+    triples_by_subject = read_triples(ttl_file, parser)
+    
+    print(f"Loaded {count_triples(triples_by_subject)} triples from {ttl_file}")
+    
+    return translations_from_table(triples_by_subject)
+
+def translations_from_graph(g):
+    return translations_from_table(group_triples(g))
+
+def translations_from_table(triples_by_subject):
+    # Dictionary to store translations by language
+    translations_by_language = defaultdict(dict)
+    
+    # Find all geological time periods (any subject with a prefLabel and/or altLabel)
+    subjects = labelled_concepts(triples_by_subject)
+    print(f"Found {len(subjects)} geological time periods")
+    
+    # Process each time period
+    count = 0
+    for subject in subjects:
+        props = triples_by_subject[subject]
+        label = english_label(props)
+        
+        # Skip if no English label found
+        if not label:
+            continue
+            
+        count += 1
+        add_translations(translations_by_language, props, label)
+    
+    print(f"Processed {count} time periods with English labels")
+    
+    # Plain dict so that the result can be stored in the cache
+    return dict(translations_by_language)
+
+def extract_translations(ttl_file='ChronostratChart2024-12.ttl', use_cache=True, translations_dir='translations', parser='auto',
+                         json_format=DEFAULT_FORMAT):
+    # Unchanged TTL files are not parsed again, the translations are loaded
+    # from the cache instead
+    if use_cache:
+        translations_by_language, cached = load_or_build(ttl_file, 'translations', lambda: collect_translations(ttl_file, parser))
+        if cached:
+            print(f"Loaded cached translations for {ttl_file}")
+    else:
+        translations_by_language = collect_translations(ttl_file, parser)
+    
+    write_translations(translations_by_language, translations_dir, json_format)
+
+def write_translations(translations_by_language, translations_dir='translations', json_format=DEFAULT_FORMAT):
+    # Create a directory for translations if it doesn't exist
+    if not os.path.exists(translations_dir):
+        os.makedirs(translations_dir)
+    
+    # Save translations to JSON files, one for each language
+    for lang, translations in translations_by_language.items():
+        output_file = os.path.join(translations_dir, f"{lang}.json")
+        write_json(translations, output_file, json_format, ensure_ascii=False)
+        print(f"Created translation file for {lang} language with {len(translations)} entries: {output_file}")
+
+def label_rows(triples_by_subject):
+    # (English label, [(language, translation), ...]) of every labelled concept, in
+    # the order of the TTL file: the input of the parallel export, smaller than the
+    # table. Generated one concept at a time, so the rows are never all held at once
+    for subject in labelled_concepts(triples_by_subject):
+        props = triples_by_subject[subject]
+        label = english_label(props)
+        if label:
+            yield label, [(getattr(obj, 'language', ''), str(obj)) for obj in props.get(SKOS.altLabel, ())]
+
+def rows_by_language(rows):
+    # Language -> [(English label, translation), ...] in the order of the rows; the
+    # English file maps every label to itself. The translations of a language are
+    # dict(pairs), as in translations_from_table
+    pairs_by_language = {'en': []}
+    for label, translations in rows:
+        for lang, text in translations:
+            if lang and lang != 'en':
+                pairs_by_language.setdefault(lang, []).append((label, text))
+        pairs_by_language['en'].append((label, label))
+    return pairs_by_language
+
+def _write_languages(pairs_by_language, translations_dir, json_format):
+    # Build and write the files of the languages of one task; a task receives the
+    # pairs of its own languages only
+    written = []
+    for lang, pairs in pairs_by_language.items():
+        output_file = os.path.join(translations_dir, f"{lang}.json")
+        translations = dict(pairs)
+        write_json(translations, output_file, json_format, ensure_ascii=False)
+        written.append((lang, len(translations), output_file))
+    return written
+
+def write_language_pairs(pairs_by_language, translations_dir='translations', json_format=DEFAULT_FORMAT, jobs=None,
+                         languages_per_task=DEFAULT_LANGUAGES_PER_TASK):
+    # Write the languages of rows_by_language() from a pool of worker processes, a
+    # task per languages_per_task languages. The table is consumed: the payload of a
+    # task is taken out of it only when the task is submitted, and at most `jobs`
+    # tasks are in flight, so the pairs of a language are released once written
+    os.makedirs(translations_dir, exist_ok=True)
+    languages = list(pairs_by_language)
+    groups = [languages[i:i + languages_per_task] for i in range(0, len(languages), languages_per_task)]
+    jobs = min(jobs or os.cpu_count() or 1, len(groups))
+
+    def payloads():
+        for group in groups:
+            yield {lang: pairs_by_language.pop(lang) for lang in group}
+
+    def report(written):
+        for lang, count, output_file in written:
+            print(f"Created translation file for {lang} language with {count} entries: {output_file}")
+
+    if jobs <= 1:
+        for payload in payloads():
+            report(_write_languages(payload, translations_dir, json_format))
+        return languages
+    with ProcessPoolExecutor(jobs) as pool:
+        pending = set()
+        for payload in payloads():
+            if len(pending) >= jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report(future.result())
+            pending.add(pool.submit(_write_languages, payload, translations_dir, json_format))
+            del payload
+        for future in as_completed(pending):
+            report(future.result())
+    return languages
+
+def write_translations_parallel(rows, translations_dir='translations', json_format=DEFAULT_FORMAT, jobs=None,
+                                languages_per_task=DEFAULT_LANGUAGES_PER_TASK):
+    # Partition the rows (any iterable, see label_rows()) by language in this process;
+    # each task of the worker pool receives the pairs of its own languages only
+    return write_language_pairs(rows_by_language(rows), translations_dir, json_format, jobs, languages_per_task)
+
+def export_translations_parallel(ttl_file='ChronostratChart2024-12.ttl', translations_dir='translations', parser='auto',
+                                 json_format=DEFAULT_FORMAT, jobs=None, languages_per_task=DEFAULT_LANGUAGES_PER_TASK):
+    # The TTL file is parsed once and its labels partitioned by language straight
+    # from the table; the translations by language are never all built in one
+    # process, so the cache of extract_translations() is not used
+    triples_by_subject = read_triples(ttl_file, parser)
+    print(f"Loaded {count_triples(triples_by_subject)} triples from {ttl_file}")
+    pairs_by_language = rows_by_language(label_rows(triples_by_subject))
+    del triples_by_subject
+    print(f"Found {len(pairs_by_language['en'])} geological time periods with English labels")
+    return write_language_pairs(pairs_by_language, translations_dir, json_format, jobs, languages_per_task)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract the translations of the chart labels to JSON files")
+    parser.add_argument('ttl_file', nargs='?', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto',
+                        help="TTL parser: the streaming reader, rdflib, or the streaming reader with rdflib as fallback (default)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="write the languages from this many worker processes, partitioned by language (0: number of CPUs)")
+    parser.add_argument('--languages-per-task', type=int, default=DEFAULT_LANGUAGES_PER_TASK,
+                        help="languages built and written together by one task of --jobs")
+    add_arguments(parser)
+    args = parser.parse_args()
+    json_format = format_from_args(parser, args)
+    if args.languages_per_task < 1:
+        parser.error("--languages-per-task must be at least 1")
+    if args.jobs is not None:
+        export_translations_parallel(args.ttl_file, parser=args.parser, json_format=json_format,
+                                     jobs=args.jobs or None, languages_per_task=args.languages_per_task)
+    else:
+        extract_translations(args.ttl_file, use_cache=not args.no_cache, parser=args.parser, json_format=json_format)
+    print("\nTranslation extraction completed!")
@@ -0,0 +1,177 @@
+#Output layer for the JSON files: streams the encoded document to disk instead of
+#building the whole string first, optionally minified, and can write pre-compressed
+#.json.gz / .json.br siblings for static web servers, in the same pass.
+#
+#orjson is used for minified output when it is installed; brotli is needed for the
+#.br files. Both are optional.
+import gzip
+import json
+import os
+from collections import namedtuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# How the JSON files are written: minified or indented with 2 spaces (the default,
+# byte-identical to json.dumps(data, indent=2)), and the compressed siblings to write
+JsonFormat = namedtuple('JsonFormat', ['minify', 'compress'])
+DEFAULT_FORMAT = JsonFormat(minify=False, compress=())
+
+COMPRESSIONS = ('gz', 'br')
+
+# Number of encoded chunks joined into one write
+BUFFER_CHUNKS = 256
+
+def json_format(minify=False, compress=()):
+    for suffix in compress:
+        if suffix not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {suffix!r}, expected one of {COMPRESSIONS}")
+        if suffix == 'br' and brotli is None:
+            raise ValueError("brotli is not installed, .json.br files can't be written")
+    return JsonFormat(minify, tuple(compress))
+
+class _Sinks:
+    # The output file and its compressed siblings, all fed with the same bytes
+    def __init__(self, path, compress):
+        # Files opened on disk, closed last, and the streams the bytes are written to
+        self.opened = []
+        self.files = []
+        self.compressor = None
+        self.brotli_file = None
+        try:
+            self.files.append(self._open(path))
+            for suffix in compress:
+                if suffix == 'gz':
+                    # mtime=0 keeps the .gz identical for identical content (stable ETags)
+                    self.files.append(gzip.GzipFile(fileobj=self._open(f"{path}.gz"), mode='wb',
+                                                    compresslevel=9, mtime=0))
+                else:
+                    if brotli is None:
+                        raise ValueError("brotli is not installed, .json.br files can't be written")
+                    self.compressor = brotli.Compressor(mode=brotli.MODE_TEXT)
+                    self.brotli_file = self._open(f"{path}.br")
+        except BaseException:
+            self.abort()
+            raise
+
+    def _open(self, path):
+        f = open(path, 'wb')
+        self.opened.append(f)
+        return f
+
+    def write(self, data):
+        for f in self.files:
+            f.write(data)
+        if self.compressor is not None:
+            self.brotli_file.write(self.compressor.process(data))
+
+    def close(self):
+        try:
+            for f in self.files[1:]:
+                f.close()
+            if self.compressor is not None:
+                self.brotli_file.write(self.compressor.finish())
+        finally:
+            for f in self.opened:
+                f.close()
+
+    def abort(self):
+        # Close what was opened and remove the partial files
+        for f in self.opened:
+            try:
+                f.close()
+            except OSError:
+                pass
+            try:
+                os.remove(f.name)
+            except OSError:
+                pass
+
+def _encode(data, minify, ensure_ascii):
+    if minify:
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=ensure_ascii, separators=(',', ':'))
+    return json.dumps(data, ensure_ascii=ensure_ascii, indent=2)
+
+def _encode_key(key, minify, ensure_ascii):
+    # With orjson, keys go through the same encoder as the values
+    if minify and orjson is not None:
+        return orjson.dumps(str(key)) + b':'
+    return json.dumps(str(key), ensure_ascii=ensure_ascii) + (':' if minify else ': ')
+
+def _streamed(data):
+    # Lists and the dicts holding lists (e.g. records with children) are written
+    # item by item; everything else is encoded in one piece
+    if isinstance(data, list):
+        return bool(data)
+    if isinstance(data, dict):
+        return any(isinstance(value, list) and value for value in data.values())
+    return False
+
+def _chunks(data, minify, ensure_ascii, level=0):
+    # Only one leaf record at a time is held in memory as a string. Each leaf is
+    # encoded on its own and indented to its level, which gives the same bytes as
+    # encoding the whole document (JSON strings can't contain a raw newline)
+    # A flat dict (e.g. a translation file) is written key by key, except by orjson,
+    # which encodes it in one call
+    if level == 0 and not _streamed(data) and not (isinstance(data, dict) and data and not (minify and orjson is not None)):
+        yield _encode(data, minify, ensure_ascii)
+        return
+
+    is_list = isinstance(data, list)
+    items = data if is_list else data.items()
+    indent = '' if minify else '\n' + '  ' * (level + 1)
+    yield ('[' if is_list else '{') + indent
+    for index, item in enumerate(items):
+        if index:
+            yield ',' + indent
+        if not is_list:
+            key, item = item
+            yield _encode_key(key, minify, ensure_ascii)
+        if _streamed(item):
+            yield from _chunks(item, minify, ensure_ascii, level + 1)
+            continue
+        encoded = _encode(item, minify, ensure_ascii)
+        if not minify:
+            encoded = encoded.replace('\n', indent)
+        yield encoded
+    yield ('\n' + '  ' * level if indent else '') + (']' if is_list else '}')
+
+def write_json(data, path, json_format=DEFAULT_FORMAT, ensure_ascii=True):
+    # Write `data` to `path` (and its compressed siblings) without building the
+    # whole document in memory. orjson output is UTF-8 and never escapes non-ASCII
+    sinks = _Sinks(path, json_format.compress)
+    try:
+        # Small chunks are joined and written in blocks
+        buffer = []
+        for chunk in _chunks(data, json_format.minify, ensure_ascii):
+            buffer.append(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+            if len(buffer) >= BUFFER_CHUNKS:
+                sinks.write(b''.join(buffer))
+                buffer = []
+        sinks.write(b''.join(buffer))
+        sinks.close()
+    except BaseException:
+        # No partial file is left behind, e.g. when the disk is full
+        sinks.abort()
+        raise
+
+def add_arguments(parser):
+    # Command-line options of the output format, shared by the scripts
+    parser.add_argument('--minify', action='store_true', help="write compact JSON without indentation")
+    parser.add_argument('--compress', nargs='+', choices=COMPRESSIONS, default=[],
+                        help="also write pre-compressed .json.gz / .json.br files next to the JSON files")
+
+def format_from_args(parser, args):
+    try:
+        return json_format(args.minify, args.compress)
+    except ValueError as e:
+        parser.error(str(e))
@@ -0,0 +1,166 @@
+#Inverted index of the labels of the chart in every language, for reverse lookups
+#("Maastrichtium"@de -> Maastrichtian) and fuzzy matching of free-text names
+#
+#Every prefLabel and altLabel of the concepts, and the concept names themselves, are
+#normalized to a key: case-folded, accents stripped, and everything but letters and
+#digits removed ("Upper  Cretaceous", "upper-cretaceous" and "UpperCretaceous" all
+#give "uppercretaceous"). Language tags are canonicalized, so the non-standard tags
+#used in the TTL file (cz, jp) are found as cs and ja. An exact lookup is one dict
+#access; fuzzy lookups use a trigram index over the keys.
+#
+#Usage: python label_index.py "Maastrichtium" [--lang de] [--fuzzy]
+import argparse
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+
+from chart_cache import load_or_build
+from converter import PARSERS, read_triples
+from extract_translations import SKOS, is_concept
+
+# Non-standard language tags found in chart files and the tags they stand for
+LANGUAGE_ALIASES = {
+    'cz': 'cs',
+    'jp': 'ja',
+}
+
+# Fuzzy matches with a lower similarity than this are not reported
+DEFAULT_MIN_SCORE = 0.5
+
+# Kana voicing marks are combining characters too, but they are part of the letter
+_KEPT_MARKS = {'\u3099', '\u309a'}
+
+# A label found by a lookup: name of the concept, language (None for the concept
+# name), original label and similarity (1.0 for exact matches)
+Match = namedtuple('Match', ['name', 'lang', 'label', 'score'])
+
+def canonical_language(lang):
+    # 'CZ' -> 'cs', 'jp' -> 'ja', 'en-gb' -> 'en-GB'
+    if not lang:
+        return None
+    primary, _, rest = lang.partition('-')
+    primary = LANGUAGE_ALIASES.get(primary.lower(), primary.lower())
+    if not rest:
+        return primary
+    return f"{primary}-{rest.upper() if len(rest) == 2 else rest.lower()}"
+
+def normalize(text):
+    # Key used in the index for a label or a query
+    decomposed = unicodedata.normalize('NFKD', text)
+    kept = ''.join(c for c in decomposed if not unicodedata.combining(c) or c in _KEPT_MARKS)
+    return ''.join(c for c in unicodedata.normalize('NFKC', kept).casefold() if c.isalnum())
+
+def trigrams(key):
+    # Padded so that short keys (e.g. two CJK characters) still have trigrams and
+    # the start and end of a key weigh more
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def label_entries(triples_by_subject):
+    # (label, language, concept name) for every label of the concepts, and
+    # (name, None, name) for the concept names
+    entries = []
+    for subject, props in triples_by_subject.items():
+        if not is_concept(props):
+            continue
+        name = str(subject).split('/')[-1]
+        entries.append((name, None, name))
+        for predicate in (SKOS.prefLabel, SKOS.altLabel):
+            for obj in props.get(predicate, ()):
+                entries.append((str(obj), canonical_language(getattr(obj, 'language', None)), name))
+    return entries
+
+class LabelIndex:
+    def __init__(self, entries):
+        # Normalized key -> matches, and the trigram index: trigram -> keys
+        self.matches = defaultdict(list)
+        for label, lang, name in entries:
+            key = normalize(label)
+            if not key:
+                continue
+            match = Match(name, lang, label, 1.0)
+            if match not in self.matches[key]:
+                self.matches[key].append(match)
+        self.matches = dict(self.matches)
+
+        self.trigrams_of = {key: trigrams(key) for key in self.matches}
+        self.keys_by_trigram = defaultdict(list)
+        for key, key_trigrams in self.trigrams_of.items():
+            for trigram in key_trigrams:
+                self.keys_by_trigram[trigram].append(key)
+
+    @classmethod
+    def from_table(cls, triples_by_subject):
+        return cls(label_entries(triples_by_subject))
+
+    @classmethod
+    def from_file(cls, ttl_file, use_cache=True, parser='auto'):
+        # The label entries are cached; building the index from them takes a few ms
+        build = lambda: label_entries(read_triples(ttl_file, parser))
+        entries = load_or_build(ttl_file, 'labels', build)[0] if use_cache else build()
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.matches)
+
+    def languages(self):
+        return sorted({match.lang for matches in self.matches.values() for match in matches if match.lang})
+
+    def lookup(self, text, lang=None):
+        # Exact lookup of the normalized text, optionally only in one language
+        # (the concept names match in every language)
+        matches = self.matches.get(normalize(text), ())
+        if lang is None:
+            return list(matches)
+        lang = canonical_language(lang)
+        return [match for match in matches if match.lang in (lang, None)]
+
+    def fuzzy(self, text, lang=None, limit=5, min_score=DEFAULT_MIN_SCORE):
+        # Best matches by trigram similarity (Dice coefficient of the trigram sets),
+        # one per concept, best first
+        query = trigrams(normalize(text))
+        shared = Counter()
+        for trigram in query:
+            # Counter.update() counts a list in C
+            shared.update(self.keys_by_trigram.get(trigram, ()))
+
+        lang = canonical_language(lang)
+        best = {}
+        for key, count in shared.items():
+            score = 2 * count / (len(query) + len(self.trigrams_of[key]))
+            if score < min_score:
+                continue
+            for match in self.matches[key]:
+                if lang is not None and match.lang not in (lang, None):
+                    continue
+                if match.name not in best or score > best[match.name].score:
+                    best[match.name] = match._replace(score=score)
+        return sorted(best.values(), key=lambda match: (-match.score, match.name))[:limit]
+
+    def resolve(self, text, lang=None, min_score=DEFAULT_MIN_SCORE):
+        # Most likely concept for a free-text name: the exact match, else the best
+        # fuzzy match, else None
+        matches = self.lookup(text, lang)
+        if matches:
+            return matches[0]
+        matches = self.fuzzy(text, lang, limit=1, min_score=min_score)
+        return matches[0] if matches else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up chart units by their label in any language")
+    parser.add_argument('text', nargs='+', help="labels to look up")
+    parser.add_argument('--ttl-file', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--lang', help="only match labels in this language")
+    parser.add_argument('--fuzzy', action='store_true', help="also list the closest labels by trigram similarity")
+    parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE)
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto')
+    args = parser.parse_args()
+
+    index = LabelIndex.from_file(args.ttl_file, use_cache=not args.no_cache, parser=args.parser)
+    for text in args.text:
+        matches = index.fuzzy(text, args.lang, min_score=args.min_score) if args.fuzzy else index.lookup(text, args.lang)
+        print(f"{text}:")
+        for match in matches:
+            print(f"    {match.name:<24} {match.score:5.2f}  {match.label} ({match.lang or 'name'})")
+        if not matches:
+            print("    no match")
@@ -0,0 +1,215 @@
+#Batch resolver of free-text stratigraphic unit names ("Upper Cretaceous", "Late
+#Cretaceous", "Maastrichtien", ...) to the concepts of the chart, for CSV or Parquet
+#exports with millions of rows
+#
+#The input is read in chunks; the values of each chunk are deduplicated and only the
+#values never seen before are sent to a pool of worker processes, each holding its
+#own label index (see label_index.py). Results are memoized in the main process, so
+#a value repeated across the whole file is resolved once. A value is resolved by an
+#exact lookup of its normalized form, then without trailing rank words ("Maastrichtian
+#Stage" -> "Maastrichtian"), then by fuzzy trigram matching.
+#
+#Usage: python name_resolver.py INPUT.csv OUTPUT.csv --column unit [--lang de] [--jobs 4]
+#Parquet input needs pyarrow.
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from chart_cache import load_or_build
+from converter import PARSERS, build_concept, read_triples
+from extract_translations import is_concept
+from label_index import DEFAULT_MIN_SCORE, LabelIndex, label_entries, normalize
+
+# Rows read from the input at once
+DEFAULT_CHUNK_SIZE = 100000
+
+# Words that free-text names often add after the unit name
+RANK_WORDS = ('stage', 'substage', 'series', 'subseries', 'system', 'subsystem', 'erathem', 'eonothem',
+              'age', 'subage', 'epoch', 'subepoch', 'period', 'subperiod', 'era', 'eon')
+
+# Columns added to every row of the output
+RESULT_FIELDS = ['name', 'rank', 'beginning', 'ending', 'label', 'lang', 'score', 'match']
+
+def resolver_data(triples_by_subject):
+    # Label entries of the label index, and the record of every concept
+    units = {}
+    for subject, props in triples_by_subject.items():
+        if is_concept(props):
+            units[subject.split('/')[-1]] = build_concept(subject, props, triples_by_subject)
+    return label_entries(triples_by_subject), units
+
+def load_resolver_data(ttl_file, use_cache=True, parser='auto'):
+    build = lambda: resolver_data(read_triples(ttl_file, parser))
+    return load_or_build(ttl_file, 'resolver', build)[0] if use_cache else build()
+
+class NameResolver:
+    def __init__(self, entries, units, lang=None, fuzzy=True, min_score=DEFAULT_MIN_SCORE):
+        self.index = LabelIndex(entries)
+        self.units = units
+        self.lang = lang
+        self.fuzzy = fuzzy
+        self.min_score = min_score
+        # Memo of the values already resolved: value -> result
+        self.resolved = {}
+
+    def strip_rank_words(self, text):
+        words = text.split()
+        while len(words) > 1 and normalize(words[-1]) in RANK_WORDS:
+            words.pop()
+        return ' '.join(words)
+
+    def find(self, text):
+        # (match, kind of match) or (None, '')
+        matches = self.index.lookup(text, self.lang)
+        if matches:
+            return matches[0], 'exact'
+        stripped = self.strip_rank_words(text)
+        if stripped != text:
+            matches = self.index.lookup(stripped, self.lang)
+            if matches:
+                return matches[0], 'exact'
+        if self.fuzzy:
+            matches = self.index.fuzzy(stripped, self.lang, limit=1, min_score=self.min_score)
+            if matches:
+                return matches[0], 'fuzzy'
+        return None, ''
+
+    def resolve(self, text):
+        # Result fields for one value; empty fields when nothing matches
+        if text in self.resolved:
+            return self.resolved[text]
+        match, kind = self.find(text) if text is not None and text.strip() else (None, '')
+        if match is None:
+            result = dict.fromkeys(RESULT_FIELDS, '')
+        else:
+            unit = self.units.get(match.name, {})
+            result = {
+                'name': match.name,
+                'rank': unit.get('rank', ''),
+                'beginning': unit.get('beginning', ''),
+                'ending': unit.get('ending', ''),
+                'label': match.label,
+                'lang': match.lang or '',
+                'score': round(match.score, 3),
+                'match': kind,
+            }
+        self.resolved[text] = result
+        return result
+
+    def resolve_many(self, values):
+        return [self.resolve(value) for value in values]
+
+# Resolver of each worker process, created once by the pool initializer
+_worker_resolver = None
+
+def _init_worker(entries, units, lang, fuzzy, min_score):
+    global _worker_resolver
+    _worker_resolver = NameResolver(entries, units, lang, fuzzy, min_score)
+
+def _resolve_in_worker(values):
+    return _worker_resolver.resolve_many(values)
+
+def read_csv_chunks(path, column, chunk_size):
+    # (field names, position of the column, chunks of rows as lists)
+    f = open(path, newline='', encoding='utf-8')
+    reader = csv.reader(f)
+    fieldnames = next(reader, None)
+    if fieldnames is None or column not in fieldnames:
+        f.close()
+        raise ValueError(f"Column {column!r} not found in {path}")
+
+    def chunks():
+        with f:
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    return
+                yield chunk
+    return fieldnames, fieldnames.index(column), chunks()
+
+def read_parquet_chunks(path, column, chunk_size):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    fieldnames = parquet_file.schema_arrow.names
+    if column not in fieldnames:
+        raise ValueError(f"Column {column!r} not found in {path}")
+
+    def chunks():
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield [list(row) for row in zip(*batch.to_pydict().values())]
+    return fieldnames, fieldnames.index(column), chunks()
+
+def resolve_file(input_file, output_file, column, ttl_file='ChronostratChart2024-12.ttl', lang=None,
+                 fuzzy=True, min_score=DEFAULT_MIN_SCORE, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 use_cache=True, parser='auto'):
+    # Write the rows of input_file to output_file (CSV) with the RESULT_FIELDS of
+    # the value of `column` appended, prefixed with 'ics_'. Returns the number of
+    # rows and of distinct values
+    entries, units = load_resolver_data(ttl_file, use_cache, parser)
+    if input_file.endswith('.parquet'):
+        fieldnames, position, chunks = read_parquet_chunks(input_file, column, chunk_size)
+    else:
+        fieldnames, position, chunks = read_csv_chunks(input_file, column, chunk_size)
+
+    # Memo of the whole file: value -> list of the formatted result fields
+    resolved = {}
+    rows_count = 0
+    jobs = jobs or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(jobs, initializer=_init_worker,
+                               initargs=(entries, units, lang, fuzzy, min_score)) if jobs > 1 else None
+    local = NameResolver(entries, units, lang, fuzzy, min_score) if pool is None else None
+    try:
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames + [f'ics_{field}' for field in RESULT_FIELDS])
+            width = len(fieldnames)
+            for chunk in chunks:
+                # Short CSV rows are padded, so that the value of a missing column is ''
+                # and the ics_* columns stay under their header
+                chunk = [row + [''] * (width - len(row)) if len(row) < width else row for row in chunk]
+                new_values = list({row[position]: None for row in chunk if row[position] not in resolved})
+                if pool is not None and new_values:
+                    # One task per worker, so every worker gets a share of the new values
+                    size = -(-len(new_values) // jobs)
+                    parts = [new_values[i:i + size] for i in range(0, len(new_values), size)]
+                    results = [result for part_results in pool.map(_resolve_in_worker, parts) for result in part_results]
+                elif new_values:
+                    results = local.resolve_many(new_values)
+                else:
+                    results = []
+                for value, result in zip(new_values, results):
+                    # Formatted once, not on every row the value appears in
+                    resolved[value] = [str(result[field]) for field in RESULT_FIELDS]
+
+                writer.writerows([row + resolved[row[position]] for row in chunk])
+                rows_count += len(chunk)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return rows_count, len(resolved)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve free-text stratigraphic names in a CSV or Parquet column to chart units")
+    parser.add_argument('input', help="CSV file, or Parquet file (needs pyarrow)")
+    parser.add_argument('output', help="CSV file with the ics_* columns added")
+    parser.add_argument('--column', required=True, help="column with the unit names")
+    parser.add_argument('--ttl-file', default='ChronostratChart2024-12.ttl')
+    parser.add_argument('--lang', help="only match labels in this language")
+    parser.add_argument('--no-fuzzy', action='store_true', help="only report exact matches")
+    parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE, help="lowest similarity of a fuzzy match")
+    parser.add_argument('--jobs', '-j', type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="rows read at once")
+    parser.add_argument('--no-cache', action='store_true', help="always parse the TTL file, ignoring the cache")
+    parser.add_argument('--parser', choices=PARSERS, default='auto')
+    args = parser.parse_args()
+
+    try:
+        rows_count, distinct = resolve_file(args.input, args.output, args.column, args.ttl_file, args.lang,
+                                            not args.no_fuzzy, args.min_score, args.jobs, args.chunk_size,
+                                            use_cache=not args.no_cache, parser=args.parser)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Resolved {rows_count} rows ({distinct} distinct values) to {args.output}")
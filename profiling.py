@@ -0,0 +1,137 @@
+#Timing and memory instrumentation of the conversion pipeline (converter.py --profile)
+#
+#A Profiler records the wall time of every phase (parse, extract, write, ...), the peak
+#memory of the process after it (max RSS) and, optionally, the peak traced Python
+#memory inside it (tracemalloc, which slows the run down). Counters hold the number
+#of concepts per collection and of table lookups. The result is a JSON report, and
+#optionally a Chrome trace (chrome://tracing, https://ui.perfetto.dev).
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+def max_rss_mb():
+    # Peak memory of the process, None where the resource module is missing (Windows).
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+class Profiler:
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = []
+        self.counters = Counter()
+        self.info = {}
+        self.start = time.perf_counter()
+        self.depth = 0
+        self.open_phases = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        # Phases can be nested; each one is reported with its depth
+        record = {'name': name, 'depth': self.depth, 'start': time.perf_counter() - self.start}
+        self.phases.append(record)
+        self.open_phases.append(record)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+            record['traced_peak_mb'] = 0.0
+        self.depth += 1
+        try:
+            yield record
+        finally:
+            self.depth -= 1
+            self.open_phases.pop()
+            record['seconds'] = time.perf_counter() - self.start - record['start']
+            record['max_rss_mb'] = max_rss_mb()
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                # Nested phases reset the peak, so their peaks are folded in
+                record['traced_peak_mb'] = max(record['traced_peak_mb'], peak / (1024 * 1024))
+                record['traced_delta_mb'] = (current - memory_before) / (1024 * 1024)
+                if self.open_phases:
+                    parent = self.open_phases[-1]
+                    parent['traced_peak_mb'] = max(parent['traced_peak_mb'], record['traced_peak_mb'])
+                tracemalloc.reset_peak()
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def report(self):
+        return {
+            'info': self.info,
+            'total_seconds': time.perf_counter() - self.start,
+            'max_rss_mb': max_rss_mb(),
+            'phases': self.phases,
+            'counters': dict(self.counters),
+        }
+
+    def write_report(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_trace(self, path):
+        # Chrome trace event format: one complete ('X') event per phase, in microseconds
+        pid, tid = os.getpid(), threading.get_ident()
+        events = [{'name': phase['name'], 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': phase['start'] * 1e6, 'dur': phase['seconds'] * 1e6,
+                   'args': {key: value for key, value in phase.items() if key.endswith('_mb')}}
+                  for phase in self.phases]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def print_summary(self):
+        max_rss = max_rss_mb()
+        memory = f", max RSS {max_rss:.1f} MB" if max_rss is not None else ''
+        print(f"\nProfile ({time.perf_counter() - self.start:.3f} s{memory}):")
+        for phase in self.phases:
+            memory = f"  traced peak {phase['traced_peak_mb']:8.2f} MB" if 'traced_peak_mb' in phase else ''
+            print(f"  {'  ' * phase['depth']}{phase['name']:<{40 - 2 * phase['depth']}} {phase['seconds'] * 1000:9.2f} ms{memory}")
+        for name, value in sorted(self.counters.items()):
+            print(f"  {name:<40} {value:9d}")
+
+class NullProfiler:
+    # Stand-in used when profiling is off
+    def __init__(self):
+        self.info = {}
+
+    @contextmanager
+    def phase(self, name):
+        yield None
+
+    def count(self, name, n=1):
+        pass
+
+class _CountingProps:
+    # Predicates of one subject, counting the lookups
+    __slots__ = ('props', 'counters')
+
+    def __init__(self, props, counters):
+        self.props = props
+        self.counters = counters
+
+    def get(self, key, default=None):
+        self.counters['predicate_lookups'] += 1
+        return self.props.get(key, default)
+
+class CountingTable:
+    # Wrapper of a triples_by_subject table counting the subject and predicate lookups
+    # done while building the records
+    def __init__(self, triples_by_subject, counters):
+        self.table = triples_by_subject
+        self.counters = counters
+
+    def get(self, key, default=None):
+        self.counters['subject_lookups'] += 1
+        props = self.table.get(key)
+        return default if props is None else _CountingProps(props, self.counters)
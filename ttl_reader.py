@@ -0,0 +1,260 @@
+#Lightweight streaming reader for the subset of Turtle used by the chronostratigraphic chart
+#
+#It reads the TTL file line by line and groups the triples by subject and predicate
+#directly, without building an rdflib Graph (or importing rdflib at all). Supported:
+#PREFIX/@prefix and BASE/@base directives, IRIs, prefixed names, the `a` keyword,
+#`;` and `,` lists, labelled and `[ ... ]` blank nodes, short and long strings with
+#language tags or datatypes, numbers and booleans. Anything else (e.g. RDF
+#collections) raises TurtleSubsetError, so that callers can fall back to rdflib.
+import re
+from collections import defaultdict
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+class TurtleSubsetError(ValueError):
+    # Raised when the file uses Turtle syntax that this reader does not support
+    pass
+
+class Namespace(str):
+    # Plain-string namespace: SKOS.prefLabel and SKOS['prefLabel'] return the full IRI
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return str(self) + name
+
+    def __getitem__(self, name):
+        return str(self) + name
+
+class Literal(str):
+    # A literal is its lexical form, plus the language tag or datatype IRI if present.
+    # This mirrors the parts of rdflib.Literal used by the converter: str(), float(),
+    # int() and the language/datatype attributes
+    __slots__ = ('language', 'datatype')
+
+    def __new__(cls, value, language=None, datatype=None):
+        literal = super().__new__(cls, value)
+        literal.language = language
+        literal.datatype = datatype
+        return literal
+
+    def __eq__(self, other):
+        return (isinstance(other, Literal) and str.__eq__(self, other)
+                and self.language == other.language and self.datatype == other.datatype)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((str(self), self.language, self.datatype))
+
+    def __reduce__(self):
+        return (Literal, (str(self), self.language, self.datatype))
+
+_TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+|\#[^\n]*)
+  | (?P<long_string>"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\')
+  | (?P<string>"(?:[^"\\\n\r]|\\.)*"|'(?:[^'\\\n\r]|\\.)*')
+  | (?P<iri><[^<>"{}|^`\\\s]*>)
+  | (?P<number>[+-]?(?:\d+\.\d+|\.\d+|\d+)(?:[eE][+-]?\d+)?)
+  | (?P<at>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+  | (?P<datatype>\^\^)
+  | (?P<punct>[;,.\[\]()])
+  | (?P<pname>(?:[A-Za-z_][\w-]*(?:\.[\w-]+)*)?:(?:[\w:%-]+(?:\.[\w:%-]+)*)?)
+  | (?P<word>[A-Za-z]+)
+''', re.VERBOSE)
+
+_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+_ESCAPE_RE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))', re.DOTALL)
+
+def _unescape(value):
+    def replace(match):
+        if match.group(1) or match.group(2):
+            return chr(int(match.group(1) or match.group(2), 16))
+        if match.group(3) not in _ESCAPES:
+            raise TurtleSubsetError(f"Invalid escape sequence \\{match.group(3)}")
+        return _ESCAPES[match.group(3)]
+    return _ESCAPE_RE.sub(replace, value) if '\\' in value else value
+
+def _tokens_of(text):
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if match is None:
+            raise TurtleSubsetError(f"Unsupported Turtle syntax near {text[pos:pos + 40]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        if kind != 'ws':
+            yield kind, match.group(kind)
+
+def _tokenize(lines):
+    # Tokenize one line at a time; a line that opens a long string is joined
+    # with the following lines until the string is closed
+    buffer = ''
+    for line in lines:
+        buffer += line
+        if (buffer.count('"""') % 2) or (buffer.count("'''") % 2):
+            continue
+        yield from _tokens_of(buffer)
+        buffer = ''
+    if buffer:
+        yield from _tokens_of(buffer)
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.lookahead = None
+        self.prefixes = {}
+        self.base = ''
+        self.bnode_count = 0
+        self.bnode_labels = {}
+        self.triple_count = 0
+        # The objects of each (subject, predicate) are the keys of a dict, which
+        # keeps them unique and in file order; they're turned into lists at the end
+        self.triples_by_subject = defaultdict(lambda: defaultdict(dict))
+
+    def peek(self):
+        if self.lookahead is None:
+            self.lookahead = next(self.tokens, (None, None))
+        return self.lookahead
+
+    def next(self):
+        token = self.peek()
+        self.lookahead = None
+        return token
+
+    def expect(self, value):
+        kind, token = self.next()
+        if token != value:
+            raise TurtleSubsetError(f"Expected {value!r}, found {token!r}")
+
+    def new_bnode(self):
+        self.bnode_count += 1
+        return f"_:b{self.bnode_count}"
+
+    def add(self, subject, predicate, obj):
+        # Duplicated triples are kept once, as in an rdflib Graph
+        objects = self.triples_by_subject[subject][predicate]
+        if obj not in objects:
+            objects[obj] = None
+            self.triple_count += 1
+
+    def iri(self, kind, token):
+        if kind == 'iri':
+            # Only absolute IRIs and IRIs relative to the base are supported
+            value = token[1:-1]
+            return value if ':' in value else self.base + value
+        if kind == 'pname':
+            prefix, _, local = token.partition(':')
+            if prefix == '_':
+                # Labelled blank node
+                if token not in self.bnode_labels:
+                    self.bnode_labels[token] = self.new_bnode()
+                return self.bnode_labels[token]
+            if prefix not in self.prefixes:
+                raise TurtleSubsetError(f"Undefined prefix {prefix!r}")
+            return self.prefixes[prefix] + re.sub(r'\\(.)', r'\1', local)
+        raise TurtleSubsetError(f"Expected an IRI, found {token!r}")
+
+    def parse(self):
+        while True:
+            kind, token = self.peek()
+            if kind is None:
+                for props in self.triples_by_subject.values():
+                    for predicate, objects in props.items():
+                        props[predicate] = list(objects)
+                return self.triples_by_subject
+            if kind == 'at' or (kind == 'word' and token.upper() in ('PREFIX', 'BASE')):
+                self.directive()
+                continue
+            self.triples()
+            self.expect('.')
+
+    def directive(self):
+        kind, token = self.next()
+        sparql_style = kind == 'word'
+        name = token.lstrip('@').lower()
+        if name == 'prefix':
+            prefix_kind, prefix = self.next()
+            if prefix_kind != 'pname' or not prefix.endswith(':'):
+                raise TurtleSubsetError(f"Invalid prefix name {prefix!r}")
+            iri_kind, iri = self.next()
+            self.prefixes[prefix[:-1]] = self.iri(iri_kind, iri)
+        elif name == 'base':
+            iri_kind, iri = self.next()
+            self.base = self.iri(iri_kind, iri)
+        else:
+            raise TurtleSubsetError(f"Unsupported directive {token!r}")
+        if not sparql_style:
+            self.expect('.')
+
+    def triples(self):
+        kind, token = self.next()
+        if token == '[':
+            subject = self.blank_node_property_list()
+            if self.peek()[1] == '.':
+                return
+        else:
+            subject = self.iri(kind, token)
+        self.predicate_object_list(subject)
+
+    def blank_node_property_list(self):
+        # Called after '['
+        node = self.new_bnode()
+        if self.peek()[1] != ']':
+            self.predicate_object_list(node)
+        self.expect(']')
+        return node
+
+    def predicate_object_list(self, subject):
+        while True:
+            kind, token = self.next()
+            predicate = RDF_TYPE if (kind == 'word' and token == 'a') else self.iri(kind, token)
+            while True:
+                self.add(subject, predicate, self.object())
+                if self.peek()[1] != ',':
+                    break
+                self.next()
+            # A ';' may be repeated or trail before the end of the list
+            if self.peek()[1] != ';':
+                return
+            while self.peek()[1] == ';':
+                self.next()
+            if self.peek()[1] in ('.', ']'):
+                return
+
+    def object(self):
+        kind, token = self.next()
+        if kind in ('string', 'long_string'):
+            quote = 3 if kind == 'long_string' else 1
+            value = _unescape(token[quote:-quote])
+            if self.peek()[0] == 'at':
+                return Literal(value, language=self.next()[1][1:])
+            if self.peek()[0] == 'datatype':
+                self.next()
+                return Literal(value, datatype=self.iri(*self.next()))
+            return Literal(value, datatype=None)
+        if kind == 'number':
+            if 'e' in token or 'E' in token:
+                datatype = XSD + 'double'
+            elif '.' in token:
+                datatype = XSD + 'decimal'
+            else:
+                datatype = XSD + 'integer'
+            return Literal(token, datatype=datatype)
+        if kind == 'word' and token in ('true', 'false'):
+            return Literal(token, datatype=XSD + 'boolean')
+        if token == '[':
+            return self.blank_node_property_list()
+        if token == '(':
+            raise TurtleSubsetError("RDF collections are not supported")
+        return self.iri(kind, token)
+
+def read_ttl(ttl_file):
+    # Return (triples_by_subject, number of triples). Subjects and predicates are
+    # plain IRI strings (blank nodes are '_:b<n>'), objects are IRI strings or
+    # Literal instances, in the order they appear in the file
+    with open(ttl_file, encoding='utf-8', newline='') as f:
+        parser = _Parser(_tokenize(f))
+        triples_by_subject = parser.parse()
+    return triples_by_subject, parser.triple_count